@@ -27,9 +27,24 @@ from database.connection import Base
 from models.usuario_model import Usuario
 from models.pedido_model import Pedido
 from models.item_pedido_model import ItensPedido
-
+from models.refresh_token_model import RefreshToken
+from models.pedido_diretorio_model import PedidoDiretorio
+from models.outbox_model import EventoOutbox
+from models.idempotency_model import IdempotencyKey
+from models.produto_model import Produto
+from models.pedido_arquivo_model import PedidoArquivo
+from models.item_pedido_arquivo_model import ItemPedidoArquivo
+
+from database.fulltext import ITEM_SEARCH_TABLE
 target_metadata = Base.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Tabelas FTS5 (virtual + shadow tables) são criadas por SQL nas migrações
+    if type_ == "table" and reflected and name.startswith(ITEM_SEARCH_TABLE):
+        return False
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -52,6 +67,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -75,7 +91,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,38 @@
+"""adiciona refresh_tokens
+
+Revision ID: 3b8e5d2a9c41
+Revises: 91286c0cf64b
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8e5d2a9c41'
+down_revision: Union[str, Sequence[str], None] = '91286c0cf64b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('refresh_tokens',
+    sa.Column('jti', sa.String(length=32), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('expira_em', sa.DateTime(), nullable=False),
+    sa.Column('revogado', sa.Boolean(), nullable=False),
+    sa.Column('revogado_em', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('jti')
+    )
+    op.create_index(op.f('ix_refresh_tokens_usuario_id'), 'refresh_tokens', ['usuario_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_refresh_tokens_usuario_id'), table_name='refresh_tokens')
+    op.drop_table('refresh_tokens')
@@ -0,0 +1,41 @@
+"""adiciona outbox_eventos
+
+Revision ID: 5e92d7c3a810
+Revises: c4a1f0e7b253
+Create Date: 2026-10-19 13:26:02.774310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e92d7c3a810'
+down_revision: Union[str, Sequence[str], None] = 'c4a1f0e7b253'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outbox_eventos',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('tipo', sa.String(), nullable=False),
+    sa.Column('pedido_id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('criado_em', sa.DateTime(), nullable=False),
+    sa.Column('tentativas', sa.Integer(), nullable=False),
+    sa.Column('proxima_tentativa_em', sa.DateTime(), nullable=False),
+    sa.Column('processado_em', sa.DateTime(), nullable=True),
+    sa.Column('ultimo_erro', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_eventos_pendentes', 'outbox_eventos', ['processado_em', 'proxima_tentativa_em', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_eventos_pendentes', table_name='outbox_eventos')
+    op.drop_table('outbox_eventos')
@@ -0,0 +1,42 @@
+"""adiciona idempotency_keys
+
+Revision ID: 8d3f61b0a2c7
+Revises: 5e92d7c3a810
+Create Date: 2026-10-19 15:02:41.518903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3f61b0a2c7'
+down_revision: Union[str, Sequence[str], None] = '5e92d7c3a810'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('idempotency_keys',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('chave', sa.String(length=255), nullable=False),
+    sa.Column('escopo', sa.String(), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('resposta', sa.Text(), nullable=True),
+    sa.Column('criado_em', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('usuario_id', 'chave', name='uq_idempotency_keys_usuario_chave')
+    )
+    op.create_index(op.f('ix_idempotency_keys_criado_em'), 'idempotency_keys', ['criado_em'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_idempotency_keys_criado_em'), table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
@@ -0,0 +1,58 @@
+"""adiciona produtos
+
+Revision ID: a6c2e9d41f05
+Revises: 8d3f61b0a2c7
+Create Date: 2026-10-19 15:48:12.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c2e9d41f05'
+down_revision: Union[str, Sequence[str], None] = '8d3f61b0a2c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('produtos',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('nome', sa.String(), nullable=False),
+    sa.Column('preco', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('ativo', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_produtos_nome'), 'produtos', ['nome'], unique=True)
+    # SQLite não altera constraints in-place: batch recria a tabela
+    with op.batch_alter_table('itens_pedidos') as batch_op:
+        batch_op.add_column(sa.Column('produto_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_itens_pedidos_produto_id', 'produtos', ['produto_id'], ['id'])
+        batch_op.create_index(batch_op.f('ix_itens_pedidos_produto_id'), ['produto_id'], unique=False)
+
+    # Um produto por nome distinto, com o preço do item mais recente
+    op.execute(
+        "INSERT INTO produtos (nome, preco, ativo) "
+        "SELECT i.nome_produto, "
+        "(SELECT r.preco_unitario FROM itens_pedidos r WHERE r.nome_produto = i.nome_produto ORDER BY r.id DESC LIMIT 1), 1 "
+        "FROM itens_pedidos i WHERE i.nome_produto IS NOT NULL GROUP BY i.nome_produto"
+    )
+    op.execute(
+        "UPDATE itens_pedidos SET produto_id = "
+        "(SELECT p.id FROM produtos p WHERE p.nome = itens_pedidos.nome_produto) "
+        "WHERE nome_produto IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('itens_pedidos') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_itens_pedidos_produto_id'))
+        batch_op.drop_constraint('fk_itens_pedidos_produto_id', type_='foreignkey')
+        batch_op.drop_column('produto_id')
+    op.drop_index(op.f('ix_produtos_nome'), table_name='produtos')
+    op.drop_table('produtos')
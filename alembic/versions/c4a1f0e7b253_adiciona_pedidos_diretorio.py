@@ -0,0 +1,40 @@
+"""adiciona pedidos_diretorio
+
+Revision ID: c4a1f0e7b253
+Revises: 3b8e5d2a9c41
+Create Date: 2026-10-19 11:03:27.540931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a1f0e7b253'
+down_revision: Union[str, Sequence[str], None] = '3b8e5d2a9c41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('pedidos_diretorio',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_pedidos_diretorio_usuario_id'), 'pedidos_diretorio', ['usuario_id'], unique=False)
+    # Pedidos existentes entram no diretório com o mesmo id (próximos ids continuam a sequência)
+    op.execute(
+        "INSERT INTO pedidos_diretorio (id, usuario_id) "
+        "SELECT id, usuario_id FROM pedidos WHERE usuario_id IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_pedidos_diretorio_usuario_id'), table_name='pedidos_diretorio')
+    op.drop_table('pedidos_diretorio')
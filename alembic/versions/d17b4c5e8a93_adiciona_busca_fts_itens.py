@@ -0,0 +1,53 @@
+"""adiciona busca fts de itens
+
+Revision ID: d17b4c5e8a93
+Revises: a6c2e9d41f05
+Create Date: 2026-10-19 16:20:37.661842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd17b4c5e8a93'
+down_revision: Union[str, Sequence[str], None] = 'a6c2e9d41f05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # FTS5 de conteúdo externo sobre itens_pedidos.nome_produto + triggers de sincronização
+    op.execute(
+        "CREATE VIRTUAL TABLE itens_pedidos_fts USING fts5("
+        "nome_produto, content='itens_pedidos', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+    op.execute(
+        "CREATE TRIGGER itens_pedidos_fts_ai AFTER INSERT ON itens_pedidos BEGIN "
+        "INSERT INTO itens_pedidos_fts(rowid, nome_produto) VALUES (new.id, new.nome_produto); END"
+    )
+    op.execute(
+        "CREATE TRIGGER itens_pedidos_fts_ad AFTER DELETE ON itens_pedidos BEGIN "
+        "INSERT INTO itens_pedidos_fts(itens_pedidos_fts, rowid, nome_produto) "
+        "VALUES ('delete', old.id, old.nome_produto); END"
+    )
+    op.execute(
+        "CREATE TRIGGER itens_pedidos_fts_au AFTER UPDATE OF nome_produto ON itens_pedidos BEGIN "
+        "INSERT INTO itens_pedidos_fts(itens_pedidos_fts, rowid, nome_produto) "
+        "VALUES ('delete', old.id, old.nome_produto); "
+        "INSERT INTO itens_pedidos_fts(rowid, nome_produto) VALUES (new.id, new.nome_produto); END"
+    )
+    # Indexa os itens existentes
+    op.execute("INSERT INTO itens_pedidos_fts(itens_pedidos_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS itens_pedidos_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS itens_pedidos_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS itens_pedidos_fts_ai")
+    op.execute("DROP TABLE IF EXISTS itens_pedidos_fts")
@@ -0,0 +1,60 @@
+"""adiciona arquivo de pedidos
+
+Revision ID: e3a95f7c1b26
+Revises: d17b4c5e8a93
+Create Date: 2026-10-19 16:58:09.114375
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a95f7c1b26'
+down_revision: Union[str, Sequence[str], None] = 'd17b4c5e8a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('pedidos', sa.Column('atualizado_em', sa.DateTime(), nullable=True))
+    # Sem histórico: pedidos existentes contam a partir da migração
+    op.execute("UPDATE pedidos SET atualizado_em = CURRENT_TIMESTAMP")
+    op.create_index('ix_pedidos_status_atualizado_em', 'pedidos', ['status', 'atualizado_em'], unique=False)
+    op.create_table('pedidos_arquivo',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('status', sa.Enum('PENDENTE', 'PROCESSANDO', 'ENTREGUE', 'CANCELADO', name='statuspedido'), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=True),
+    sa.Column('preco', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+    sa.Column('arquivado_em', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_pedidos_arquivo_usuario_id'), 'pedidos_arquivo', ['usuario_id'], unique=False)
+    op.create_table('itens_pedidos_arquivo',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('pedido_id', sa.Integer(), nullable=True),
+    sa.Column('produto_id', sa.Integer(), nullable=True),
+    sa.Column('nome_produto', sa.String(), nullable=True),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.Column('preco_unitario', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('subtotal', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.ForeignKeyConstraint(['pedido_id'], ['pedidos_arquivo.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_itens_pedidos_arquivo_pedido_id'), 'itens_pedidos_arquivo', ['pedido_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_itens_pedidos_arquivo_pedido_id'), table_name='itens_pedidos_arquivo')
+    op.drop_table('itens_pedidos_arquivo')
+    op.drop_index(op.f('ix_pedidos_arquivo_usuario_id'), table_name='pedidos_arquivo')
+    op.drop_table('pedidos_arquivo')
+    op.drop_index('ix_pedidos_status_atualizado_em', table_name='pedidos')
+    with op.batch_alter_table('pedidos') as batch_op:
+        batch_op.drop_column('atualizado_em')
@@ -0,0 +1,73 @@
+"""armazena dinheiro em centavos
+
+Revision ID: f0b8d2a4c6e1
+Revises: e3a95f7c1b26
+Create Date: 2026-10-19 17:40:55.302618
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f0b8d2a4c6e1'
+down_revision: Union[str, Sequence[str], None] = 'e3a95f7c1b26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tabela, [(coluna, nullable)], tipo anterior)
+MONEY_COLUMNS = [
+    ('pedidos', [('preco', True)], sa.Float()),
+    ('itens_pedidos', [('preco_unitario', False), ('subtotal', True)], sa.Float()),
+    ('produtos', [('preco', False)], sa.Numeric(precision=10, scale=2)),
+    ('pedidos_arquivo', [('preco', True)], sa.Numeric(precision=10, scale=2)),
+    ('itens_pedidos_arquivo', [('preco_unitario', False), ('subtotal', True)], sa.Numeric(precision=10, scale=2)),
+]
+
+# Recriar itens_pedidos (batch) remove os triggers da busca FTS
+FTS_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS itens_pedidos_fts_ai AFTER INSERT ON itens_pedidos BEGIN "
+    "INSERT INTO itens_pedidos_fts(rowid, nome_produto) VALUES (new.id, new.nome_produto); END",
+    "CREATE TRIGGER IF NOT EXISTS itens_pedidos_fts_ad AFTER DELETE ON itens_pedidos BEGIN "
+    "INSERT INTO itens_pedidos_fts(itens_pedidos_fts, rowid, nome_produto) "
+    "VALUES ('delete', old.id, old.nome_produto); END",
+    "CREATE TRIGGER IF NOT EXISTS itens_pedidos_fts_au AFTER UPDATE OF nome_produto ON itens_pedidos BEGIN "
+    "INSERT INTO itens_pedidos_fts(itens_pedidos_fts, rowid, nome_produto) "
+    "VALUES ('delete', old.id, old.nome_produto); "
+    "INSERT INTO itens_pedidos_fts(rowid, nome_produto) VALUES (new.id, new.nome_produto); END",
+]
+
+
+def _restore_fts() -> None:
+    for statement in FTS_TRIGGERS:
+        op.execute(statement)
+    op.execute("INSERT INTO itens_pedidos_fts(itens_pedidos_fts) VALUES ('rebuild')")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for tabela, colunas, tipo_anterior in MONEY_COLUMNS:
+        # Converte antes de trocar o tipo: a cópia do batch faz CAST para INTEGER
+        op.execute(
+            f"UPDATE {tabela} SET "
+            + ", ".join(f"{coluna} = ROUND({coluna} * 100)" for coluna, _ in colunas)
+        )
+        with op.batch_alter_table(tabela) as batch_op:
+            for coluna, nullable in colunas:
+                batch_op.alter_column(coluna, existing_type=tipo_anterior, type_=sa.Integer(), existing_nullable=nullable)
+    _restore_fts()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tabela, colunas, tipo_anterior in MONEY_COLUMNS:
+        with op.batch_alter_table(tabela) as batch_op:
+            for coluna, nullable in colunas:
+                batch_op.alter_column(coluna, existing_type=sa.Integer(), type_=tipo_anterior, existing_nullable=nullable)
+        op.execute(
+            f"UPDATE {tabela} SET "
+            + ", ".join(f"{coluna} = {coluna} / 100.0" for coluna, _ in colunas)
+        )
+    _restore_fts()
@@ -0,0 +1,84 @@
+"""
+Benchmark do custo de cadastro/login sob tráfego com muitos duplicados.
+
+Mede, via TestClient e SQLite em memória:
+- create_account com email novo vs. email duplicado (duplicado não deve pagar bcrypt)
+- login com senha errada vs. email inexistente (custos devem ser equivalentes)
+
+Uso:
+    python -m benchmarks.bench_auth [--requests 20]
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("SECRET_KEY", "chave-de-benchmark")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+# Sem limite de login durante a medição
+os.environ.setdefault("LOGIN_RATE_IP_CAPACITY", "1000000")
+os.environ.setdefault("LOGIN_RATE_EMAIL_CAPACITY", "1000000")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from main import app
+from database.connection import Base
+from database.dependencies import get_session
+
+
+def _client() -> TestClient:
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+
+    def override_get_session():
+        session = SessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_session] = override_get_session
+    return TestClient(app)
+
+
+def _measure(label: str, n: int, call) -> None:
+    tempos = []
+    for i in range(n):
+        inicio = time.perf_counter()
+        call(i)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    print(f"{label:<32} mediana={statistics.median(tempos):8.2f} ms  p95={sorted(tempos)[int(n * 0.95) - 1]:8.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    client = _client()
+    conta = {"nome": "bench", "email": "bench@test.com", "senha": "segredo123"}
+    client.post("/auth/create_account", json=conta)
+
+    _measure("signup email novo", args.requests, lambda i: client.post(
+        "/auth/create_account", json={**conta, "email": f"novo{i}@test.com"}))
+    _measure("signup email duplicado", args.requests, lambda i: client.post(
+        "/auth/create_account", json=conta))
+    _measure("login senha errada", args.requests, lambda i: client.post(
+        "/auth/login", json={"email": conta["email"], "senha": "errada"}))
+    _measure("login email inexistente", args.requests, lambda i: client.post(
+        "/auth/login", json={"email": f"ninguem{i}@test.com", "senha": "errada"}))
+
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
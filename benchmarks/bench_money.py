@@ -0,0 +1,101 @@
+"""
+Benchmark de dinheiro em REAL (legado) vs. centavos inteiros (utils.money.Cents).
+
+Mede, com SQLite em memória e N itens:
+- agregação: SUM(subtotal) de todos os itens (e o drift do REAL)
+- leitura + serialização: carregar os itens e gerar o JSON de ItemPedidoOutSchema
+
+Uso:
+    python -m benchmarks.bench_money [--rows 200000] [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+from decimal import Decimal
+
+from pydantic import TypeAdapter
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, create_engine, func, select
+
+from schemas.itemOrder_schema import ItemPedidoOutSchema
+from utils.money import Cents
+
+metadata = MetaData()
+
+
+def _colunas(tipo_dinheiro) -> list[Column]:
+    return [
+        Column("id", Integer, primary_key=True),
+        Column("pedido_id", Integer),
+        Column("nome_produto", String),
+        Column("quantidade", Integer),
+        Column("preco_unitario", tipo_dinheiro),
+        Column("subtotal", tipo_dinheiro),
+    ]
+
+
+# Layout anterior (REAL + Decimal(str(...)) na aplicação) e o atual (centavos)
+itens_real = Table("itens_real", metadata, *_colunas(Float))
+itens_centavos = Table("itens_centavos", metadata, *_colunas(Cents))
+
+# Mesmo caminho do FastAPI: valida no schema de saída e serializa
+itens_json = TypeAdapter(list[ItemPedidoOutSchema])
+
+
+def _seed(engine, rows: int) -> None:
+    metadata.create_all(engine)
+    linhas = [
+        {"id": i, "pedido_id": i // 5, "nome_produto": "Pizza", "quantidade": 1,
+         "preco_unitario": Decimal("0.10"), "subtotal": Decimal("0.10")}
+        for i in range(1, rows + 1)
+    ]
+    with engine.begin() as conn:
+        conn.execute(itens_real.insert(), [{**l, "preco_unitario": 0.1, "subtotal": 0.1} for l in linhas])
+        conn.execute(itens_centavos.insert(), linhas)
+
+
+def _measure(label: str, repeat: int, call) -> object:
+    tempos, resultado = [], None
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        resultado = call()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    print(f"{label:<36} mediana={statistics.median(tempos):9.2f} ms  min={min(tempos):9.2f} ms")
+    return resultado
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite:///:memory:")
+    _seed(engine, args.rows)
+    esperado = Decimal("0.10") * args.rows
+
+    with engine.connect() as conn:
+        total_real = _measure("SUM REAL + Decimal(str())", args.repeat, lambda: Decimal(str(
+            conn.execute(select(func.sum(itens_real.c.subtotal))).scalar())))
+        total_centavos = _measure("SUM centavos", args.repeat, lambda: conn.execute(
+            select(func.sum(itens_centavos.c.subtotal))).scalar())
+        print(f"{'total esperado':<36} {esperado}")
+        print(f"{'total REAL':<36} {total_real}  (drift {total_real - esperado})")
+        print(f"{'total centavos':<36} {total_centavos}  (drift {total_centavos - esperado})")
+
+        def _ler_real():
+            rows = conn.execute(select(itens_real)).mappings().all()
+            return itens_json.dump_json(itens_json.validate_python([
+                {**r, "preco_unitario": Decimal(str(r["preco_unitario"])), "subtotal": Decimal(str(r["subtotal"]))}
+                for r in rows
+            ]))
+
+        def _ler_centavos():
+            rows = conn.execute(select(itens_centavos)).mappings().all()
+            return itens_json.dump_json(itens_json.validate_python([dict(r) for r in rows]))
+
+        _measure("leitura+JSON REAL + Decimal(str())", args.repeat, _ler_real)
+        _measure("leitura+JSON centavos", args.repeat, _ler_centavos)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Arquivamento de pedidos em estado final (ENTREGUE/CANCELADO).
+
+Move pedidos sem mudança há mais de --older-than-days dias de pedidos/itens_pedidos
+para pedidos_arquivo/itens_pedidos_arquivo, no mesmo banco (ou shard).
+
+- Em lotes por id, um lote por transação (cópia + remoção atômicas)
+- Pedidos em estado final não mudam mais: nada concorre com a movimentação
+- Pode ser reexecutado a qualquer momento (ex.: cron diário)
+- Leituras por id (GET /orders/{id}, /orders/{id}/items) consultam o arquivo
+  quando o pedido não está nas tabelas quentes
+- Itens arquivados saem da busca full-text (o índice cobre só itens_pedidos)
+
+Uso:
+    python -m database.archive --older-than-days 90
+"""
+import argparse
+from datetime import timedelta
+from sqlalchemy import DateTime, delete, insert, literal, select
+from sqlalchemy.engine import Engine
+
+from database.connection import db
+from database import sharding
+from models.pedido_model import Pedido, StatusPedido
+from models.item_pedido_model import ItensPedido
+from models.pedido_arquivo_model import PedidoArquivo
+from models.item_pedido_arquivo_model import ItemPedidoArquivo
+from utils.clock import utcnow
+
+pedidos = Pedido.__table__
+itens = ItensPedido.__table__
+pedidos_arquivo = PedidoArquivo.__table__
+itens_arquivo = ItemPedidoArquivo.__table__
+
+ARCHIVABLE_STATUSES = (StatusPedido.ENTREGUE, StatusPedido.CANCELADO)
+
+
+def _archive_batch(engine: Engine, cutoff, batch_size: int) -> int:
+    with engine.begin() as conn:
+        ids = list(conn.execute(
+            select(pedidos.c.id)
+            .where(pedidos.c.status.in_(ARCHIVABLE_STATUSES), pedidos.c.atualizado_em < cutoff)
+            .order_by(pedidos.c.id)
+            .limit(batch_size)
+        ).scalars())
+        if not ids:
+            return 0
+        arquivado_em = utcnow()
+        conn.execute(insert(pedidos_arquivo).from_select(
+            ["id", "status", "usuario_id", "preco", "atualizado_em", "arquivado_em"],
+            select(
+                pedidos.c.id, pedidos.c.status, pedidos.c.usuario_id, pedidos.c.preco,
+                pedidos.c.atualizado_em, literal(arquivado_em, DateTime()),
+            ).where(pedidos.c.id.in_(ids)),
+        ))
+        colunas_itens = ["id", "pedido_id", "produto_id", "nome_produto", "quantidade", "preco_unitario", "subtotal"]
+        conn.execute(insert(itens_arquivo).from_select(
+            colunas_itens,
+            select(*(itens.c[nome] for nome in colunas_itens)).where(itens.c.pedido_id.in_(ids)),
+        ))
+        conn.execute(delete(itens).where(itens.c.pedido_id.in_(ids)))
+        conn.execute(delete(pedidos).where(pedidos.c.id.in_(ids)))
+    return len(ids)
+
+
+def archive_orders(older_than: timedelta, batch_size: int = 500, engines: list[Engine] | None = None) -> int:
+    """Arquiva os pedidos elegíveis em cada banco (shards ou primário). Retorna o total movido."""
+    cutoff = utcnow() - older_than
+    total = 0
+    for engine in engines or sharding.shard_dbs or [db]:
+        while True:
+            movidos = _archive_batch(engine, cutoff, batch_size)
+            total += movidos
+            if movidos < batch_size:
+                break
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--older-than-days", type=float, default=90)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    total = archive_orders(timedelta(days=args.older_than_days), batch_size=args.batch_size)
+    print(f"Pedidos arquivados: {total}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,20 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import declarative_base
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
 
 # Configuração do banco de dados SQLite
 # O caminho pode ser ajustado conforme necessário
 
 db = create_engine("sqlite:///database/database.db")
 Base = declarative_base()
+
+# Réplicas de leitura opcionais, separadas por vírgula.
+# Ex. local (SQLite somente leitura): sqlite:///file:database/replica.db?mode=ro&uri=true
+read_dbs = [
+    create_engine(url.strip())
+    for url in os.getenv("DATABASE_READ_URLS", "").split(",")
+    if url.strip()
+]
@@ -1,9 +1,15 @@
-from database.connection import db
+from contextlib import contextmanager
+from itertools import count
+import os
+import time
+from database.connection import db, read_dbs
+from database.sharding import sharding_enabled, shard_index, shard_session, order_owner
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker, Session
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-from utils.security import SECRET_KEY, ALGORITHM
+from jose import JWTError
+from utils.security import decode_token
 from models.usuario_model import Usuario
 
 
@@ -12,18 +18,48 @@ http_bearer_access = HTTPBearer(scheme_name="AccessToken")
 http_bearer_refresh = HTTPBearer(scheme_name="RefreshToken")
 
 
-def get_session():
+SessionLocal = sessionmaker(bind=db)
+# Sessões de réplica em round-robin (vazio = leituras no primário)
+read_sessionmakers = [sessionmaker(bind=engine) for engine in read_dbs]
+_replica_counter = count()
+
+# Read-your-writes: após um commit, o cliente lê do primário por alguns segundos
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+
+@contextmanager
+def read_your_writes(session: Session, response: Response):
+    """Marca o cliente como "grudado" no primário quando a sessão faz commit."""
+    def _after_commit(_session):
+        if read_sessionmakers:
+            until = time.time() + READ_YOUR_WRITES_SECONDS
+            response.set_cookie(
+                READ_YOUR_WRITES_COOKIE,
+                f"{until:.3f}",
+                max_age=int(READ_YOUR_WRITES_SECONDS) + 1,
+                httponly=True,
+            )
+
+    event.listen(session, "after_commit", _after_commit)
     try:
-        Session = sessionmaker(bind=db)
-        session = Session()
-        yield session
+        yield
+    finally:
+        event.remove(session, "after_commit", _after_commit)
+
+
+def get_session(response: Response):
+    session = SessionLocal()
+    try:
+        with read_your_writes(session, response):
+            yield session
     finally:
         session.close()
 
 
 def verify_token(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         return payload
     except JWTError:
         return None
@@ -31,7 +67,7 @@ def verify_token(token: str):
 
 def get_token_payload(token: str) -> dict:
     try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        return decode_token(token)
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalido.", headers={"WWW-Authenticate": "Bearer"})
 
@@ -70,4 +106,63 @@ def verify_refresh_bearer(token: HTTPAuthorizationCredentials = Depends(http_bea
     payload = verify_token(token.credentials)
     if not payload or payload.get("type") != "refresh":
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalido.", headers={"WWW-Authenticate": "Bearer"})
-    return payload
\ No newline at end of file
+    return payload
+
+
+def sticky_to_primary(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def get_order_session(
+    request: Request,
+    session: Session = Depends(get_session),
+    current_user: Usuario = Depends(get_current_user),
+):
+    """
+    Sessão para pedidos/itens.
+    - Sem shards: a própria sessão do primário
+    - Com shards: shard do dono do pedido da rota ({order_id}) ou do usuário atual
+    """
+    if not sharding_enabled():
+        yield session
+        return
+
+    usuario_id = current_user.usuario_id
+    order_id = request.path_params.get("order_id")
+    if order_id is not None:
+        try:
+            usuario_id = order_owner(session, int(order_id)) or usuario_id
+        except ValueError:
+            pass
+    shard = shard_session(shard_index(usuario_id), session.get_bind())
+    try:
+        yield shard
+    finally:
+        shard.close()
+
+
+def get_read_session(
+    request: Request,
+    session: Session = Depends(get_session),
+    order_session: Session = Depends(get_order_session),
+):
+    """
+    Sessão para rotas somente leitura.
+    - Modo shard: o shard resolvido em get_order_session
+    - Sem réplicas configuradas, ou logo após uma escrita do cliente: primário
+    - Caso contrário: próxima réplica (round-robin)
+    """
+    if sharding_enabled():
+        yield order_session
+        return
+    if not read_sessionmakers or sticky_to_primary(request):
+        yield session
+        return
+    replica_session = read_sessionmakers[next(_replica_counter) % len(read_sessionmakers)]()
+    try:
+        yield replica_session
+    finally:
+        replica_session.close()
@@ -0,0 +1,34 @@
+"""
+Busca full-text (SQLite FTS5) sobre itens_pedidos.nome_produto.
+
+Tabela FTS de conteúdo externo (guarda só o índice, não duplica o texto),
+sincronizada por triggers: qualquer caminho de escrita (ORM, UPDATE em lote,
+reshard) mantém o índice consistente na mesma transação.
+"""
+from sqlalchemy import DDL, Table, event
+
+ITEM_SEARCH_TABLE = "itens_pedidos_fts"
+
+ITEM_SEARCH_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {ITEM_SEARCH_TABLE} USING fts5("
+    "nome_produto, content='itens_pedidos', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS itens_pedidos_fts_ai AFTER INSERT ON itens_pedidos BEGIN "
+    f"INSERT INTO {ITEM_SEARCH_TABLE}(rowid, nome_produto) VALUES (new.id, new.nome_produto); END",
+    f"CREATE TRIGGER IF NOT EXISTS itens_pedidos_fts_ad AFTER DELETE ON itens_pedidos BEGIN "
+    f"INSERT INTO {ITEM_SEARCH_TABLE}({ITEM_SEARCH_TABLE}, rowid, nome_produto) VALUES ('delete', old.id, old.nome_produto); END",
+    f"CREATE TRIGGER IF NOT EXISTS itens_pedidos_fts_au AFTER UPDATE OF nome_produto ON itens_pedidos BEGIN "
+    f"INSERT INTO {ITEM_SEARCH_TABLE}({ITEM_SEARCH_TABLE}, rowid, nome_produto) VALUES ('delete', old.id, old.nome_produto); "
+    f"INSERT INTO {ITEM_SEARCH_TABLE}(rowid, nome_produto) VALUES (new.id, new.nome_produto); END",
+]
+
+
+def register_item_search(table: Table) -> None:
+    """Cria/remove o índice FTS junto com a tabela (create_all, create_shard_schema)."""
+    for statement in ITEM_SEARCH_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(
+        table,
+        "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {ITEM_SEARCH_TABLE}").execute_if(dialect="sqlite"),
+    )
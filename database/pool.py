@@ -0,0 +1,67 @@
+import os
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from database.connection import db, read_dbs
+from database import sharding
+from utils.load_shedding import deadline_exceeded
+
+# Instruções da VM do SQLite entre checagens do deadline
+DEADLINE_CHECK_INTERVAL = 1000
+
+
+def all_engines() -> list[Engine]:
+    """Primário, réplicas de leitura e shards configurados."""
+    return [db, *read_dbs, *sharding.shard_dbs]
+
+
+def warm_pool(engine: Engine, size: int) -> int:
+    """Abre `size` conexões simultâneas e devolve ao pool (primeiros requests não pagam o connect)."""
+    conexoes = []
+    try:
+        for _ in range(size):
+            conn = engine.connect()
+            conexoes.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in conexoes:
+            conn.close()
+    return len(conexoes)
+
+
+def warm_all_pools() -> int:
+    # Padrão: o tamanho do pool de cada engine (QueuePool), limitado por DB_POOL_WARM
+    limite = int(os.getenv("DB_POOL_WARM", "5"))
+    total = 0
+    for engine in all_engines():
+        size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+        total += warm_pool(engine, min(size, limite))
+    return total
+
+
+def dispose_engines_after_fork() -> None:
+    """
+    Conexões abertas no processo pai não podem ser usadas pelo filho (sockets/handles
+    compartilhados). close=False descarta o pool herdado sem fechar as conexões do pai.
+    """
+    for engine in all_engines():
+        engine.dispose(close=False)
+
+
+def _abort_past_deadline() -> int:
+    # Valor != 0 interrompe a query em execução ("interrupted")
+    return 1 if deadline_exceeded() else 0
+
+
+def install_deadline_interrupt(engine: Engine) -> None:
+    """
+    Aborta queries do SQLite que passarem do deadline do request (LoadSheddingMiddleware).
+    Vale também para queries rodando no threadpool, que o cancelamento da task não alcança.
+    Outros bancos: configure statement_timeout/lock_timeout no próprio servidor.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_progress_handler(dbapi_connection, connection_record) -> None:
+        dbapi_connection.set_progress_handler(_abort_past_deadline, DEADLINE_CHECK_INTERVAL)
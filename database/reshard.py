@@ -0,0 +1,106 @@
+"""
+Migração/resharding de pedidos e itens para um novo conjunto de shards.
+
+Origem: os shards atuais (DATABASE_SHARD_URLS) ou, sem shards, o banco primário.
+Destino: as URLs passadas em --target; o shard de cada pedido é
+crc32(usuario_id) % len(target).
+
+- Copia em lotes por id (keyset pagination), um pedido + itens por transação
+- Idempotente: pedidos já presentes no destino são pulados (pode ser reexecutado)
+- Garante o pedido no diretório do primário (ids globais continuam válidos)
+- Não apaga nada na origem: valide, troque DATABASE_SHARD_URLS e remova depois
+- A outbox não é copiada: drene os eventos pendentes antes da troca
+- O arquivo (pedidos_arquivo) não é copiado: rode o reshard antes do arquivamento
+  ou mantenha os shards antigos para consulta
+
+Uso:
+    python -m database.reshard --target sqlite:///database/shard_0.db,sqlite:///database/shard_1.db
+"""
+import argparse
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.engine import Engine
+
+from database.connection import db
+from database.sharding import shard_dbs, shard_index, create_shard_schema
+from models.pedido_model import Pedido
+from models.item_pedido_model import ItensPedido
+from models.pedido_diretorio_model import PedidoDiretorio
+
+pedidos = Pedido.__table__
+itens = ItensPedido.__table__
+diretorio = PedidoDiretorio.__table__
+
+
+def _copy_order(pedido: dict, source: Engine, target: Engine) -> tuple[bool, int]:
+    """Copia um pedido e seus itens. Retorna (copiado, itens_com_novo_id)."""
+    with source.connect() as conn:
+        itens_rows = [
+            dict(row._mapping)
+            for row in conn.execute(select(itens).where(itens.c.pedido_id == pedido["id"]).order_by(itens.c.id))
+        ]
+
+    renumerados = 0
+    with target.begin() as conn:
+        if conn.execute(select(pedidos.c.id).where(pedidos.c.id == pedido["id"])).first():
+            return False, 0
+        conn.execute(insert(pedidos).values(**pedido))
+        for item in itens_rows:
+            # Ids de itens são locais ao shard: em colisão, o item recebe um id novo
+            if conn.execute(select(itens.c.id).where(itens.c.id == item["id"])).first():
+                item = {k: v for k, v in item.items() if k != "id"}
+                renumerados += 1
+            conn.execute(insert(itens).values(**item))
+    return True, renumerados
+
+
+def reshard(targets: list[Engine], batch_size: int = 500) -> dict:
+    sources = shard_dbs or [db]
+    for engine in targets:
+        create_shard_schema(engine)
+
+    stats = {"lidos": 0, "copiados": 0, "itens_renumerados": 0}
+    for source in sources:
+        ultimo_id = 0
+        while True:
+            with source.connect() as conn:
+                lote = [
+                    dict(row._mapping)
+                    for row in conn.execute(
+                        select(pedidos).where(pedidos.c.id > ultimo_id).order_by(pedidos.c.id).limit(batch_size)
+                    )
+                ]
+            if not lote:
+                break
+            ultimo_id = lote[-1]["id"]
+
+            entradas = [{"id": p["id"], "usuario_id": p["usuario_id"]} for p in lote if p["usuario_id"] is not None]
+            if entradas:
+                with db.begin() as conn:
+                    conn.execute(insert(diretorio).prefix_with("OR IGNORE", dialect="sqlite"), entradas)
+            for pedido in lote:
+                stats["lidos"] += 1
+                if pedido["usuario_id"] is None:
+                    continue
+                target = targets[shard_index(pedido["usuario_id"], len(targets))]
+                copiado, renumerados = _copy_order(pedido, source, target)
+                stats["copiados"] += int(copiado)
+                stats["itens_renumerados"] += renumerados
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", required=True, help="URLs dos shards de destino, separadas por vírgula")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    targets = [create_engine(url.strip()) for url in args.target.split(",") if url.strip()]
+    stats = reshard(targets, batch_size=args.batch_size)
+    print(
+        f"Pedidos lidos: {stats['lidos']} | copiados: {stats['copiados']} | "
+        f"itens com novo id: {stats['itens_renumerados']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import zlib
+from typing import Callable, Optional, TypeVar
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models.pedido_model import Pedido
+from models.item_pedido_model import ItensPedido
+from models.pedido_diretorio_model import PedidoDiretorio
+from models.outbox_model import EventoOutbox
+from models.pedido_arquivo_model import PedidoArquivo
+from models.item_pedido_arquivo_model import ItemPedidoArquivo
+
+T = TypeVar("T")
+
+# Modo shard (opcional): pedidos/itens distribuídos por hash do usuario_id.
+# Usuários, tokens e o diretório de pedidos continuam no banco primário.
+shard_dbs: list[Engine] = [
+    create_engine(url.strip())
+    for url in os.getenv("DATABASE_SHARD_URLS", "").split(",")
+    if url.strip()
+]
+
+# Modelos que vivem nos shards (o restante fica no primário).
+# A outbox acompanha os pedidos para ser gravada na mesma transação;
+# o arquivo também, para que o arquivamento mova linhas dentro do mesmo banco.
+SHARDED_MODELS = [Pedido, ItensPedido, EventoOutbox, PedidoArquivo, ItemPedidoArquivo]
+
+# Dono de um pedido nunca muda: cache em memória de order_id -> usuario_id
+_order_owner_cache: dict[int, int] = {}
+
+
+def sharding_enabled() -> bool:
+    return bool(shard_dbs)
+
+
+def shard_index(usuario_id: int, shard_count: Optional[int] = None) -> int:
+    """Shard de um usuário. crc32 é estável entre processos (ao contrário de hash())."""
+    shard_count = shard_count or len(shard_dbs)
+    return zlib.crc32(str(usuario_id).encode()) % shard_count
+
+
+def shard_session(index: int, primary_bind: Engine) -> Session:
+    """Sessão com pedidos/itens no shard `index` e o restante no primário."""
+    engine = shard_dbs[index]
+    return Session(bind=primary_bind, binds={model: engine for model in SHARDED_MODELS})
+
+
+def create_shard_schema(engine: Engine) -> None:
+    from database.connection import Base
+
+    Base.metadata.create_all(bind=engine, tables=[model.__table__ for model in SHARDED_MODELS])
+
+
+def allocate_order_id(session: Session, usuario_id: int) -> int:
+    """Reserva um id global de pedido no diretório (primário), na transação da sessão."""
+    result = session.execute(insert(PedidoDiretorio.__table__).values(usuario_id=usuario_id))
+    order_id = result.inserted_primary_key[0]
+    # Cache só após o commit: em rollback o SQLite reaproveita o id (sem AUTOINCREMENT)
+    # e outro processo pode entregá-lo a outro usuário
+    session.info.setdefault("donos_pedidos", {})[order_id] = usuario_id
+    return order_id
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_owners_after_commit(session: Session) -> None:
+    _order_owner_cache.update(session.info.pop("donos_pedidos", {}))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_owners_after_rollback(session: Session) -> None:
+    session.info.pop("donos_pedidos", None)
+
+
+def order_owner(session: Session, order_id: int) -> Optional[int]:
+    """Dono do pedido pelo diretório (None se o id não existe)."""
+    usuario_id = _order_owner_cache.get(order_id)
+    if usuario_id is None:
+        usuario_id = (
+            session.query(PedidoDiretorio.usuario_id)
+            .filter(PedidoDiretorio.id == order_id)
+            .scalar()
+        )
+        if usuario_id is not None:
+            _order_owner_cache[order_id] = usuario_id
+    return usuario_id
+
+
+async def fan_out(fn: Callable[[Session], T]) -> list[T]:
+    """
+    Executa `fn` em todos os shards em paralelo (threadpool).
+    Os objetos retornados são desanexados da sessão antes do close.
+    """
+    def _run(engine: Engine) -> T:
+        with Session(bind=engine) as session:
+            result = fn(session)
+            session.expunge_all()
+            return result
+
+    return await asyncio.gather(*(run_in_threadpool(_run, engine) for engine in shard_dbs))
@@ -1,17 +1,51 @@
-# uvicorn main:app --reload // para rodar o projeto
+# Desenvolvimento: uvicorn main:app --reload
+# Produção: python -m server (vários workers, uvloop/httptools; ver server.py)
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from routes.auth_routes import auth_router
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from routes.auth_routes import auth_router, jwks_router
 from routes.order_routes import order_router
-from passlib.context import CryptContext
-from dotenv import load_dotenv
+from routes.product_routes import product_router
+from database.connection import db
+from database.pool import all_engines, install_deadline_interrupt, warm_all_pools
+from services.token_service import revoked_tokens
+from services.outbox_worker import outbox_worker
+from services.catalog_service import catalog
+from utils.security import warm_password_context
+from utils.load_shedding import LoadSheddingMiddleware, default_route_groups
 import os
 
-load_dotenv()
 
-SECRET_KEY = os.getenv("SECRET_KEY")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Aquecimento: conexões do pool e contexto de senha prontos antes do primeiro request
+    if os.getenv("WARMUP_ENABLED", "true").lower() == "true":
+        await run_in_threadpool(warm_all_pools)
+        await run_in_threadpool(warm_password_context)
+    with Session(db) as session:
+        # Carrega os jti revogados para checagem em memória no refresh
+        revoked_tokens.load(session)
+        # Catálogo de produtos em memória (preço dos itens sem query)
+        catalog.load(session)
+    # Worker da outbox: efeitos colaterais dos pedidos fora do caminho dos requests
+    if os.getenv("OUTBOX_WORKER_ENABLED", "true").lower() == "true":
+        outbox_worker.start()
+    yield
+    await outbox_worker.stop()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
+
+# Deadline e limite de concorrência por grupo de rotas (auth x pedidos); ver utils/load_shedding.py
+if os.getenv("LOAD_SHEDDING_ENABLED", "true").lower() == "true":
+    app.add_middleware(LoadSheddingMiddleware, groups=default_route_groups())
+    # Queries que passarem do deadline do request são abortadas no banco
+    for engine in all_engines():
+        install_deadline_interrupt(engine)
 
 app.include_router(auth_router)
-app.include_router(order_router)
\ No newline at end of file
+app.include_router(jwks_router)
+app.include_router(order_router)
+app.include_router(product_router)
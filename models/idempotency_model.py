@@ -0,0 +1,26 @@
+from database.connection import Base
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint
+
+class IdempotencyKey(Base):
+    """
+    Resposta armazenada por Idempotency-Key (escopo: usuário + chave).
+    `status_code` nulo = requisição reservada, ainda em processamento.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("usuario_id", "chave", name="uq_idempotency_keys_usuario_chave"),)
+
+    id = Column("id", Integer, primary_key=True, autoincrement=True)
+    usuario_id = Column("usuario_id", Integer, ForeignKey("usuarios.id"), nullable=False)
+    chave = Column("chave", String(255), nullable=False)
+    escopo = Column("escopo", String, nullable=False)
+    fingerprint = Column("fingerprint", String(64), nullable=False)
+    status_code = Column("status_code", Integer)
+    resposta = Column("resposta", Text)
+    criado_em = Column("criado_em", DateTime, nullable=False, index=True)
+
+    def __init__(self, usuario_id, chave, escopo, fingerprint, criado_em):
+        self.usuario_id = usuario_id
+        self.chave = chave
+        self.escopo = escopo
+        self.fingerprint = fingerprint
+        self.criado_em = criado_em
@@ -0,0 +1,15 @@
+from database.connection import Base
+from utils.money import Cents
+from sqlalchemy import Column, Integer, String, ForeignKey
+
+class ItemPedidoArquivo(Base):
+    """Item de um pedido arquivado (mesmo id e colunas de itens_pedidos)."""
+    __tablename__ = "itens_pedidos_arquivo"
+
+    id = Column("id", Integer, primary_key=True, autoincrement=False)
+    pedido_id = Column("pedido_id", Integer, ForeignKey("pedidos_arquivo.id"), index=True)
+    produto_id = Column("produto_id", Integer)
+    nome_produto = Column("nome_produto", String)
+    quantidade = Column("quantidade", Integer, nullable=False)
+    preco_unitario = Column("preco_unitario", Cents, nullable=False)
+    subtotal = Column("subtotal", Cents)
@@ -1,16 +1,23 @@
 from database.connection import Base
-from sqlalchemy import Column, Integer, String, ForeignKey, Numeric
+from utils.money import Cents
+from sqlalchemy import Column, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship
+from database.fulltext import register_item_search
 
 class ItensPedido(Base):
     __tablename__ = "itens_pedidos"
 
     id = Column("id", Integer, primary_key=True, autoincrement=True)
     pedido_id = Column("pedido_id", Integer, ForeignKey("pedidos.id"))
+    produto_id = Column("produto_id", Integer, ForeignKey("produtos.id"), index=True)
+    # Nome do produto no momento da compra (o catálogo pode mudar depois)
     nome_produto = Column("nome_produto", String)
     quantidade = Column("quantidade", Integer, default=1, nullable=False)
-    preco_unitario = Column("preco_unitario", Numeric(10, 2), nullable=False)
-    subtotal = Column("subtotal", Numeric(10, 2))
+    preco_unitario = Column("preco_unitario", Cents, nullable=False)
+    subtotal = Column("subtotal", Cents)
     # Relacionamento N:1 com Pedido
     pedido = relationship("Pedido", back_populates="itens")
 
+
+# Índice full-text de nome_produto (SQLite FTS5), criado junto com a tabela
+register_item_search(ItensPedido.__table__)
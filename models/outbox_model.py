@@ -0,0 +1,31 @@
+from database.connection import Base
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+
+class EventoOutbox(Base):
+    """
+    Outbox transacional: eventos de pedidos gravados na mesma transação da mudança
+    e entregues depois pelo worker em background (services/outbox_worker.py).
+    """
+    __tablename__ = "outbox_eventos"
+    __table_args__ = (
+        # Fila: pendentes por ordem de chegada
+        Index("ix_outbox_eventos_pendentes", "processado_em", "proxima_tentativa_em", "id"),
+    )
+
+    id = Column("id", Integer, primary_key=True, autoincrement=True)
+    tipo = Column("tipo", String, nullable=False)
+    pedido_id = Column("pedido_id", Integer, nullable=False)
+    payload = Column("payload", Text, nullable=False)
+    criado_em = Column("criado_em", DateTime, nullable=False)
+    tentativas = Column("tentativas", Integer, default=0, nullable=False)
+    proxima_tentativa_em = Column("proxima_tentativa_em", DateTime, nullable=False)
+    processado_em = Column("processado_em", DateTime)
+    ultimo_erro = Column("ultimo_erro", Text)
+
+    def __init__(self, tipo, pedido_id, payload, criado_em):
+        self.tipo = tipo
+        self.pedido_id = pedido_id
+        self.payload = payload
+        self.criado_em = criado_em
+        self.tentativas = 0
+        self.proxima_tentativa_em = criado_em
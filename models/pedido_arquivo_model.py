@@ -0,0 +1,18 @@
+from database.connection import Base
+from utils.money import Cents
+from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Enum as SqlEnum
+from sqlalchemy.orm import relationship
+from models.pedido_model import StatusPedido
+
+class PedidoArquivo(Base):
+    """Pedido em estado final movido de `pedidos` pelo job de arquivamento (somente leitura)."""
+    __tablename__ = "pedidos_arquivo"
+
+    pedido_id = Column("id", Integer, primary_key=True, autoincrement=False)
+    status = Column("status", SqlEnum(StatusPedido))
+    usuario_id = Column("usuario_id", Integer, ForeignKey("usuarios.id"), index=True)
+    preco = Column("preco", Cents)
+    atualizado_em = Column("atualizado_em", DateTime)
+    arquivado_em = Column("arquivado_em", DateTime, nullable=False)
+    itens = relationship("ItemPedidoArquivo", lazy="selectin", order_by="ItemPedidoArquivo.id")
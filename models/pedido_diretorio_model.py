@@ -0,0 +1,16 @@
+from database.connection import Base
+from sqlalchemy import Column, Integer, ForeignKey
+
+class PedidoDiretorio(Base):
+    """
+    Diretório de pedidos no banco primário (modo shard).
+    Gera ids globais para `pedidos` e guarda o dono, que determina o shard.
+    """
+    __tablename__ = "pedidos_diretorio"
+
+    id = Column("id", Integer, primary_key=True, autoincrement=True)
+    usuario_id = Column("usuario_id", Integer, ForeignKey("usuarios.id"), nullable=False, index=True)
+
+    def __init__(self, usuario_id, id=None):
+        self.id = id
+        self.usuario_id = usuario_id
@@ -1,8 +1,10 @@
 from database.connection import Base
-from sqlalchemy import Column, Integer, Float, ForeignKey, Numeric
+from utils.money import Cents
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from enum import Enum
 from sqlalchemy import Enum as SqlEnum
+from utils.clock import utcnow
 
 class StatusPedido(Enum):
     PENDENTE = "pendente"
@@ -12,11 +14,15 @@ class StatusPedido(Enum):
 
 class Pedido(Base):
     __tablename__= "pedidos"
+    # Varredura do job de arquivamento (estado final + mais antigos que o limite)
+    __table_args__ = (Index("ix_pedidos_status_atualizado_em", "status", "atualizado_em"),)
 
     pedido_id = Column("id", Integer, primary_key=True, autoincrement=True)
     status = Column("status", SqlEnum(StatusPedido))
     usuario_id = Column("usuario_id", Integer, ForeignKey("usuarios.id"))
-    preco = Column("preco", Numeric(10, 2))
+    preco = Column("preco", Cents)
+    # Última mudança (onupdate vale também para UPDATE em lote via Core)
+    atualizado_em = Column("atualizado_em", DateTime, default=utcnow, onupdate=utcnow)
     # Relacionamento 1:N com ItensPedido
     itens = relationship(
         "ItensPedido",
@@ -0,0 +1,16 @@
+from database.connection import Base
+from utils.money import Cents
+from sqlalchemy import Column, Integer, String, Boolean
+
+class Produto(Base):
+    __tablename__ = "produtos"
+
+    produto_id = Column("id", Integer, primary_key=True, autoincrement=True)
+    nome = Column("nome", String, nullable=False, unique=True, index=True)
+    preco = Column("preco", Cents, nullable=False)
+    ativo = Column("ativo", Boolean, nullable=False, default=True)
+
+    def __init__(self, nome, preco, ativo=True):
+        self.nome = nome
+        self.preco = preco
+        self.ativo = ativo
@@ -0,0 +1,19 @@
+from database.connection import Base
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    # jti (JWT ID) é o identificador único gravado no claim do refresh token
+    jti = Column("jti", String(32), primary_key=True)
+    usuario_id = Column("usuario_id", Integer, ForeignKey("usuarios.id"), nullable=False, index=True)
+    # Datas em UTC (sem timezone, SQLite não armazena offset)
+    expira_em = Column("expira_em", DateTime, nullable=False)
+    revogado = Column("revogado", Boolean, default=False, nullable=False)
+    revogado_em = Column("revogado_em", DateTime)
+
+    def __init__(self, jti, usuario_id, expira_em, revogado=False):
+        self.jti = jti
+        self.usuario_id = usuario_id
+        self.expira_em = expira_em
+        self.revogado = revogado
@@ -1,17 +1,31 @@
-from fastapi import APIRouter, Depends
-from database.dependencies import get_session
+from fastapi import APIRouter, Depends, Request
+from utils.load_shedding import run_in_group_threadpool
+from database.dependencies import get_session, get_current_user
 from models.usuario_model import Usuario
 from services.auth_service import user_auth
-from utils.security import bcrypt_context, create_access_token, create_refresh_token
+from utils.security import bcrypt_context, create_access_token, keyset
+from services.token_service import issue_refresh_token, rotate_refresh_token, revoke_refresh_token, revoke_all_refresh_tokens
 from schemas.usuario_schema import UsuarioSchema, UsuarioOutSchema
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from schemas.login_schema import LoginSchema
 from schemas.token_schema import TokenResponseSchema
 from fastapi import HTTPException
 from database.dependencies import verify_refresh_bearer
 from schemas.message_schema import MessageSchema
+from utils.rate_limit import login_rate_limiter
 
 auth_router = APIRouter(prefix="/auth", tags=["auth"])
+# Descoberta de chaves públicas para nós que apenas verificam tokens
+jwks_router = APIRouter(tags=["auth"])
+
+
+@jwks_router.get("/.well-known/jwks.json")
+async def jwks():
+    """
+    Retorna as chaves públicas (JWKS) usadas para validar os tokens (RS*/ES*)
+    """
+    return keyset.jwks()
 
     
 @auth_router.get("/", response_model=MessageSchema)
@@ -26,29 +40,38 @@ async def create_account(usuario_schema: UsuarioSchema, session: Session = Depen
     """
     Essa rota cria uma conta no sistema
     """
-    senha_criptografada = bcrypt_context.hash(usuario_schema.senha)
-    usuario = session.query(Usuario).filter(Usuario.email==usuario_schema.email).first()
+    # Checa o email (índice único) antes do bcrypt: cadastro duplicado não paga o hash
+    usuario = session.query(Usuario.usuario_id).filter(Usuario.email==usuario_schema.email).first()
     if usuario:
         raise HTTPException(status_code=409, detail="Usuario já existe.")
-    else:
-        novo_usuario = Usuario(usuario_schema.nome, usuario_schema.email, senha_criptografada, usuario_schema.ativo, usuario_schema.admin)
-        session.add(novo_usuario)
+    # Hash é CPU-bound: roda no threadpool para não travar o event loop
+    senha_criptografada = await run_in_group_threadpool(bcrypt_context.hash, usuario_schema.senha)
+    novo_usuario = Usuario(usuario_schema.nome, usuario_schema.email, senha_criptografada, usuario_schema.ativo, usuario_schema.admin)
+    session.add(novo_usuario)
+    try:
         session.commit()
-        session.refresh(novo_usuario)
-        return novo_usuario
+    except IntegrityError:
+        # Cadastro concorrente com o mesmo email venceu a corrida
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Usuario já existe.")
+    session.refresh(novo_usuario)
+    return novo_usuario
 
 @auth_router.post("/login", response_model=TokenResponseSchema)
-async def login(login_schema: LoginSchema, session: Session = Depends(get_session)):
+async def login(login_schema: LoginSchema, request: Request, session: Session = Depends(get_session)):
     """
     Essa rota faz login no sistema
+    Limite de tentativas por IP e por email (429 com Retry-After quando excedido)
     """
-    usuario = user_auth(login_schema.email, login_schema.senha, session)
+    # Antes de qualquer query/bcrypt: tráfego abusivo custa só um lookup em memória
+    login_rate_limiter.check(request.client.host if request.client else None, login_schema.email)
+    usuario = await run_in_group_threadpool(user_auth, login_schema.email, login_schema.senha, session)
     if not usuario:
         raise HTTPException(status_code=401, detail="Email ou senha invalidos ou usuario não encontrado.")
     else:
         token_data = {"sub": str(usuario.usuario_id)}
         acess_token = create_access_token(token_data)
-        refresh_token = create_refresh_token(token_data)
+        refresh_token = issue_refresh_token(session, usuario.usuario_id)
         return {"access_token": acess_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 @auth_router.post("/refresh_token", response_model=TokenResponseSchema)
@@ -56,17 +79,30 @@ async def refresh_token(payload: dict = Depends(verify_refresh_bearer), session:
     """
     Essa rota faz refresh no token.
     Envie o refresh token no header Authorization: Bearer (use o botão Authorize → RefreshToken).
+    O refresh token usado é revogado e um novo é emitido (rotação).
     """
-    user_id = payload.get("sub")
-    try:
-        user_id = int(user_id)
-    except (TypeError, ValueError):
-        raise HTTPException(status_code=401, detail="Token invalido.")
+    new_refresh_token = rotate_refresh_token(session, payload)
+    user_id = int(payload.get("sub"))
     usuario = session.query(Usuario).filter(Usuario.usuario_id == user_id).first()
     if not usuario:
         raise HTTPException(status_code=401, detail="Email ou senha invalidos ou usuario não encontrado.")
 
     token_data = {"sub": str(usuario.usuario_id)}
     acess_token = create_access_token(token_data)
-    new_refresh_token = create_refresh_token(token_data)
     return {"access_token": acess_token, "refresh_token": new_refresh_token, "token_type": "bearer"}
+
+@auth_router.post("/logout", response_model=MessageSchema)
+async def logout(payload: dict = Depends(verify_refresh_bearer), session: Session = Depends(get_session)):
+    """
+    Essa rota revoga o refresh token enviado no header Authorization: Bearer.
+    """
+    revoke_refresh_token(session, payload)
+    return {"mensagem": "Logout realizado.", "autenticado": False}
+
+@auth_router.post("/revoke_all", response_model=MessageSchema)
+async def revoke_all(current_user: Usuario = Depends(get_current_user), session: Session = Depends(get_session)):
+    """
+    Essa rota revoga todos os refresh tokens do usuário autenticado (requer AccessToken)
+    """
+    revogados = revoke_all_refresh_tokens(session, current_user.usuario_id)
+    return {"mensagem": f"{revogados} refresh token(s) revogado(s).", "autenticado": False}
@@ -1,43 +1,95 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from database.dependencies import get_session, get_current_user
-from schemas.order_schema import OrderSchema, OrderOutSchema
+from database.dependencies import get_session, get_order_session, get_read_session, get_current_user, sticky_to_primary
+from database.sharding import sharding_enabled, allocate_order_id, fan_out
+import asyncio
+import heapq
+from schemas.order_schema import OrderSchema, OrderOutSchema, BulkStatusSchema, BulkStatusOutSchema
 from models.pedido_model import Pedido
 from models.usuario_model import Usuario
 from fastapi import HTTPException
 from models.pedido_model import StatusPedido
-from models.item_pedido_model import ItensPedido
 from schemas.itemOrder_schema import ItemPedidoCreateSchema, ItemPedidoOutSchema
 from services.order_service import add_item_to_order as svc_add_item
 from services.order_service import remove_item_from_order as svc_remove_item
+from services.order_service import bulk_update_status as svc_bulk_update_status, bulk_status_results
+from services.order_service import find_order, find_order_items, find_orders
+from services import order_events
+from services.search_service import build_match_query, search_items
+from services.idempotency_service import run_idempotent, IDEMPOTENCY_HEADER
+from typing import Optional
+from sqlalchemy.engine import Engine
+from utils.single_flight import SingleFlight
 
 
 order_router = APIRouter(prefix="/orders", tags=["orders"], dependencies=[Depends(get_current_user)])
 
+# Leituras idênticas e concorrentes compartilham uma busca + serialização
+order_reads = SingleFlight()
+_orders_json = TypeAdapter(list[OrderOutSchema])
+
+
+def _load_order_json(engine: Engine, order_id: int) -> Optional[bytes]:
+    # Sessão própria: a busca compartilhada não depende da sessão de um request específico
+    with Session(bind=engine) as session:
+        pedido = find_order(session, order_id)
+        return None if pedido is None else OrderOutSchema.model_validate(pedido).model_dump_json().encode()
+
+
+def _load_all_orders_json(engine: Engine, arquivados: bool = False) -> Optional[bytes]:
+    with Session(bind=engine) as session:
+        pedidos = find_orders(session, arquivados=arquivados)
+        return _orders_json.dump_json(_orders_json.validate_python(pedidos)) if pedidos else None
+
+
+async def _coalesced_read(request: Request, name: str, key, fetch) -> Optional[bytes]:
+    # Cliente grudado no primário (acabou de escrever) não entra em uma busca já em andamento
+    if sticky_to_primary(request):
+        return await fetch()
+    return await order_reads.do(name, key, fetch)
+
+
 @order_router.get("/list", response_model=list[OrderOutSchema])
 async def list_orders(
-    session: Session = Depends(get_session),
+    request: Request,
+    session: Session = Depends(get_read_session),
     current_user: Usuario = Depends(get_current_user),
     all: bool = False,
+    arquivados: bool = False,
 ):
     """
     Lista pedidos do usuário autenticado.
-    - Se `all=true` e for admin: lista todos os pedidos.
+    - Se `all=true` e for admin: lista todos os pedidos
+      (requisições concorrentes compartilham a mesma busca).
     - Se `all=true` e NÃO for admin: 403.
     - Caso contrário: lista apenas pedidos do usuário atual.
+    - Pedidos arquivados (finalizados/cancelados antigos) só com `arquivados=true`.
     Retorna 404 se não houver pedidos conforme o filtro.
     """
     try:
         if all:
             if not current_user.admin:
                 raise HTTPException(status_code=403, detail="Sem permissão para listar todos os pedidos")
-            pedidos = session.query(Pedido).all()
+            if sharding_enabled():
+                async def fetch():
+                    # Fan-out concorrente nos shards; cada shard já vem ordenado por id
+                    por_shard = await fan_out(lambda s: find_orders(s, arquivados=arquivados))
+                    pedidos = list(heapq.merge(*por_shard, key=lambda p: p.pedido_id))
+                    return _orders_json.dump_json(_orders_json.validate_python(pedidos)) if pedidos else None
+                key = ("shards", arquivados)
+            else:
+                engine = session.get_bind(Pedido)
+                fetch = lambda: run_in_threadpool(_load_all_orders_json, engine, arquivados)
+                key = (id(engine), arquivados)
+            body = await _coalesced_read(request, "orders_list_all", key, fetch)
+            if body is None:
+                raise HTTPException(status_code=404, detail="Nenhum pedido encontrado")
+            return Response(body, media_type="application/json")
         else:
-            pedidos = (
-                session.query(Pedido)
-                .filter(Pedido.usuario_id == current_user.usuario_id)
-                .all()
-            )
+            pedidos = find_orders(session, current_user.usuario_id, arquivados)
 
         if not pedidos:
             raise HTTPException(status_code=404, detail="Nenhum pedido encontrado")
@@ -53,19 +105,17 @@ async def list_orders(
 
 @order_router.get("/my", response_model=list[OrderOutSchema])
 async def list_my_orders(
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
     current_user: Usuario = Depends(get_current_user),
+    arquivados: bool = False,
 ):
     """
     Lista todos os pedidos do usuário autenticado.
+    Pedidos arquivados (finalizados/cancelados antigos) só com `arquivados=true`.
     Retorna 404 se não houver pedidos.
     """
     try:
-        pedidos = (
-            session.query(Pedido)
-            .filter(Pedido.usuario_id == current_user.usuario_id)
-            .all()
-        )
+        pedidos = find_orders(session, current_user.usuario_id, arquivados)
         if not pedidos:
             raise HTTPException(status_code=404, detail="Nenhum pedido encontrado")
         return pedidos
@@ -74,34 +124,189 @@ async def list_my_orders(
     except Exception:
         raise HTTPException(status_code=500, detail="Erro ao listar pedidos do usuário. Tente novamente mais tarde.")
 
+@order_router.get("/items/search", response_model=list[ItemPedidoOutSchema])
+async def search_order_items(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10_000),
+    session: Session = Depends(get_read_session),
+    current_user: Usuario = Depends(get_current_user),
+    all: bool = False,
+):
+    """
+    Busca itens de pedidos pelo nome do produto (full-text, prefixo por palavra),
+    ordenados por relevância. Paginação por `limit`/`offset`.
+    - Se `all=true` e for admin: busca em todos os pedidos.
+    - Se `all=true` e NÃO for admin: 403.
+    - Caso contrário: apenas itens dos pedidos do usuário atual.
+    Retorna 404 se nenhum item for encontrado.
+    """
+    if all and not current_user.admin:
+        raise HTTPException(status_code=403, detail="Sem permissão para buscar em todos os pedidos")
+    match = build_match_query(q)
+    usuario_id = None if all else current_user.usuario_id
+    try:
+        if sharding_enabled() and all:
+            # Cada shard devolve até offset+limit itens já ranqueados; merge global por relevância
+            por_shard = await fan_out(lambda s: search_items(s, match, None, limit=offset + limit))
+            ranqueados = heapq.merge(*por_shard, key=lambda r: (r[0], r[1].pedido_id, r[1].id))
+            itens = [item for _, item in ranqueados][offset:offset + limit]
+        else:
+            itens = [item for _, item in search_items(session, match, usuario_id, limit=limit, offset=offset)]
+        if not itens:
+            raise HTTPException(status_code=404, detail="Nenhum item encontrado")
+        return itens
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=500, detail="Erro ao buscar itens. Tente novamente mais tarde.")
+
+@order_router.post("/bulk-status", response_model=BulkStatusOutSchema)
+async def bulk_update_order_status(
+    bulk_schema: BulkStatusSchema,
+    session: Session = Depends(get_order_session),
+    current_user: Usuario = Depends(get_current_user),
+):
+    """
+    Altera o status de vários pedidos em uma única operação (somente admin).
+    - Seleção por `ids` e/ou filtros `usuario_id`/`status_atual`
+    - Pedidos CANCELADO/ENTREGUE não são alterados (resultado `conflito`)
+    - Resultado por id: atualizado, nao_encontrado ou conflito
+    """
+    if not current_user.admin:
+        raise HTTPException(status_code=403, detail="Sem permissão para alterar pedidos em lote")
+    try:
+        def _apply(s: Session):
+            return svc_bulk_update_status(
+                session=s,
+                novo_status=bulk_schema.status,
+                ids=bulk_schema.ids,
+                usuario_id=bulk_schema.usuario_id,
+                status_atual=bulk_schema.status_atual,
+            )
+
+        if sharding_enabled():
+            por_shard = await fan_out(_apply)
+            atualizados = sorted(i for shard_atualizados, _ in por_shard for i in shard_atualizados)
+            conflitos = [i for _, shard_conflitos in por_shard for i in shard_conflitos]
+        else:
+            atualizados, conflitos = _apply(session)
+
+        return {
+            "atualizados": len(atualizados),
+            "resultados": bulk_status_results(bulk_schema.ids, atualizados, conflitos),
+        }
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=500, detail="Erro ao alterar pedidos em lote. Tente novamente mais tarde.")
+
+
+@order_router.get("/single-flight/stats")
+async def single_flight_stats(current_user: Usuario = Depends(get_current_user)):
+    """
+    Métricas do agrupamento de leituras concorrentes (por processo), somente admin:
+    buscas executadas e requisições que aproveitaram uma busca em andamento.
+    """
+    if not current_user.admin:
+        raise HTTPException(status_code=403, detail="Sem permissão para ver métricas")
+    return order_reads.stats()
+
+
+# Intervalo de heartbeat do SSE (mantém a conexão viva em proxies)
+SSE_HEARTBEAT_SECONDS = 15
+
+
+@order_router.get("/events")
+async def order_events_stream(
+    session: Session = Depends(get_session),
+    current_user: Usuario = Depends(get_current_user),
+    all: bool = False,
+):
+    """
+    Stream SSE (text/event-stream) com mudanças nos pedidos do usuário autenticado:
+    pedido_criado, status_alterado, item_adicionado, item_removido.
+    - Se `all=true` e for admin: eventos de todos os pedidos.
+    - Se `all=true` e NÃO for admin: 403.
+    """
+    if all and not current_user.admin:
+        raise HTTPException(status_code=403, detail="Sem permissão para acompanhar todos os pedidos")
+    usuario_id = None if all else current_user.usuario_id
+    # Libera a conexão do pool: o stream pode ficar aberto por muito tempo
+    session.close()
+
+    async def stream():
+        async with order_events.broker.subscribe(usuario_id) as subscription:
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield event.to_sse()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @order_router.post("", response_model=OrderOutSchema)
-async def create_order(order_schema: OrderSchema, session: Session = Depends(get_session), current_user: Usuario = Depends(get_current_user)):
+async def create_order(
+    order_schema: OrderSchema,
+    session: Session = Depends(get_order_session),
+    current_user: Usuario = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+):
     """
     Cria um novo pedido (requer AccessToken)
+    Com header Idempotency-Key, retries com a mesma chave devolvem o pedido já criado.
     """
-    # Cria pedido para o usuário autenticado
-    # TODO: migrar para modelo baseado em itens de pedido (produto_id, quantidade) e calcular o total no servidor.
-    # O campo 'preco' vindo do cliente é uma simplificação didática e será removido em refator futura.
-    new_order = Pedido(current_user.usuario_id, order_schema.preco)
-    session.add(new_order)
-    session.commit()
-    session.refresh(new_order)
-    return new_order
+    def _create():
+        # Cria pedido para o usuário autenticado
+        # TODO: migrar para modelo baseado em itens de pedido (produto_id, quantidade) e calcular o total no servidor.
+        # O campo 'preco' vindo do cliente é uma simplificação didática e será removido em refator futura.
+        new_order = Pedido(current_user.usuario_id, order_schema.preco)
+        if sharding_enabled():
+            # Id global reservado no diretório do primário (determina o shard nas rotas por id)
+            new_order.pedido_id = allocate_order_id(session, current_user.usuario_id)
+        session.add(new_order)
+        order_events.record_order_event(session, "pedido_criado", new_order)
+        # Commit feito por run_idempotent, junto com a resposta armazenada
+        return new_order
+
+    return run_idempotent(
+        session=session,
+        usuario_id=current_user.usuario_id,
+        chave=idempotency_key,
+        escopo="POST /orders",
+        payload=order_schema,
+        handler=_create,
+        response_model=OrderOutSchema,
+    )
 
 @order_router.get("/{order_id}", response_model=OrderOutSchema)
-async def get_order_by_id(order_id: int, session: Session = Depends(get_session)):
+async def get_order_by_id(order_id: int, request: Request, session: Session = Depends(get_read_session)):
     """
     Retorna um pedido pelo ID (requer AccessToken)
+    Pedidos arquivados são buscados no arquivo de forma transparente.
+    Requisições concorrentes pelo mesmo pedido compartilham a mesma busca.
     """
-    pedido = session.query(Pedido).filter(Pedido.pedido_id == order_id).first()
-    if not pedido:
+    engine = session.get_bind(Pedido)
+    body = await _coalesced_read(
+        request,
+        "order_by_id",
+        (order_id, id(engine)),
+        lambda: run_in_threadpool(_load_order_json, engine, order_id),
+    )
+    if body is None:
         raise HTTPException(status_code=404, detail="Pedido não encontrado")
-    return pedido
+    return Response(body, media_type="application/json")
 
 @order_router.delete("/{order_id}", response_model=OrderOutSchema)
 async def delete_order(
     order_id: int,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_order_session),
     current_user: Usuario = Depends(get_current_user),
 ):
     """
@@ -116,6 +321,7 @@ async def delete_order(
     if not (current_user.admin or pedido.usuario_id == current_user.usuario_id):
         raise HTTPException(status_code=403, detail="Sem permissão para cancelar este pedido")
     pedido.status = StatusPedido.CANCELADO
+    order_events.record_order_event(session, "status_alterado", pedido)
     session.commit()
     # Retorna o pedido atualizado conforme o schema de saída
     return pedido
@@ -123,7 +329,7 @@ async def delete_order(
 @order_router.post("/{order_id}/finalize", response_model=OrderOutSchema)
 async def finalize_order(
     order_id: int,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_order_session),
     current_user: Usuario = Depends(get_current_user),
 ):
     """
@@ -147,6 +353,7 @@ async def finalize_order(
             raise HTTPException(status_code=409, detail="Pedido já finalizado")
 
         pedido.status = StatusPedido.ENTREGUE
+        order_events.record_order_event(session, "status_alterado", pedido)
         session.commit()
         return pedido
     except HTTPException:
@@ -158,21 +365,31 @@ async def finalize_order(
 async def add_item_to_order(
     order_id: int,
     item_pedido_schema: ItemPedidoCreateSchema,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_order_session),
     current_user: Usuario = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
 ):
     """
     Adiciona um item a um pedido existente.
     Permissão: admin ou dono do pedido.
+    Com header Idempotency-Key, retries com a mesma chave não duplicam o item.
     """
     try:
-        novo_item = svc_add_item(
+        return run_idempotent(
             session=session,
-            current_user=current_user,
-            order_id=order_id,
-            item_data=item_pedido_schema,
+            usuario_id=current_user.usuario_id,
+            chave=idempotency_key,
+            escopo=f"POST /orders/add-item/{order_id}",
+            payload=item_pedido_schema,
+            handler=lambda: svc_add_item(
+                session=session,
+                current_user=current_user,
+                order_id=order_id,
+                item_data=item_pedido_schema,
+            ),
+            response_model=ItemPedidoOutSchema,
+            status_code=201,
         )
-        return novo_item
     except HTTPException:
         raise
     except Exception:
@@ -182,32 +399,24 @@ async def add_item_to_order(
 @order_router.get("/{order_id}/items", response_model=list[ItemPedidoOutSchema])
 async def list_order_items(
     order_id: int,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
     current_user: Usuario = Depends(get_current_user),
 ):
     """
     Lista itens de um pedido específico.
     Permissão: admin ou dono do pedido.
     Retorna 404 se o pedido não existir ou se não houver itens.
+    Pedidos arquivados são buscados no arquivo de forma transparente.
     """
     try:
-        pedido = (
-            session.query(Pedido)
-            .filter(Pedido.pedido_id == order_id)
-            .first()
-        )
+        pedido = find_order(session, order_id)
         if not pedido:
             raise HTTPException(status_code=404, detail="Pedido não encontrado")
 
         if not (current_user.admin or pedido.usuario_id == current_user.usuario_id):
             raise HTTPException(status_code=403, detail="Sem permissão para listar itens deste pedido")
 
-        # Usa a tabela de itens diretamente; poderia usar pedido.itens com relationship
-        itens = (
-            session.query(ItensPedido)
-            .filter(ItensPedido.pedido_id == order_id)
-            .all()
-        )
+        itens = find_order_items(session, pedido)
         if not itens:
             raise HTTPException(status_code=404, detail="Nenhum item encontrado")
 
@@ -221,7 +430,7 @@ async def list_order_items(
 async def remove_order_item(
     order_id: int,
     item_id: int,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_order_session),
     current_user: Usuario = Depends(get_current_user),
 ):
     """
@@ -0,0 +1,94 @@
+from collections import defaultdict
+from decimal import Decimal
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from database.dependencies import get_session, get_read_session, get_current_user
+from database.sharding import sharding_enabled, fan_out
+from models.usuario_model import Usuario
+from schemas.product_schema import ProdutoSchema, ProdutoUpdateSchema, ProdutoOutSchema, ProdutoVendasSchema
+from services.catalog_service import catalog, create_product, update_product, product_sales
+
+
+product_router = APIRouter(prefix="/products", tags=["products"], dependencies=[Depends(get_current_user)])
+
+
+def _require_admin(current_user: Usuario, action: str) -> None:
+    if not current_user.admin:
+        raise HTTPException(status_code=403, detail=f"Sem permissão para {action}")
+
+
+@product_router.get("", response_model=list[ProdutoOutSchema])
+async def list_products(session: Session = Depends(get_session), inativos: bool = False):
+    """
+    Lista o catálogo (servido do cache em memória).
+    - Se `inativos=true`: inclui produtos desativados.
+    """
+    return [e for e in catalog.entries(session) if inativos or e.ativo]
+
+
+@product_router.get("/report", response_model=list[ProdutoVendasSchema])
+async def product_sales_report(
+    session: Session = Depends(get_read_session),
+    current_user: Usuario = Depends(get_current_user),
+):
+    """
+    Vendas por produto (quantidade, total e nº de pedidos), agregadas por produto_id.
+    Permissão: somente admin.
+    """
+    _require_admin(current_user, "ver o relatório de produtos")
+    if sharding_enabled():
+        # Soma parcial de cada shard, combinada aqui
+        acumulado = defaultdict(lambda: [0, Decimal("0.00"), 0])
+        for linhas in await fan_out(product_sales):
+            for produto_id, quantidade, total, pedidos in linhas:
+                acumulado[produto_id][0] += quantidade
+                acumulado[produto_id][1] += total
+                acumulado[produto_id][2] += pedidos
+        linhas = [(produto_id, *valores) for produto_id, valores in sorted(acumulado.items())]
+    else:
+        linhas = product_sales(session)
+
+    nomes = {e.produto_id: e.nome for e in catalog.entries(session)}
+    return [
+        {"produto_id": produto_id, "nome": nomes.get(produto_id, ""), "quantidade": quantidade, "total": total, "pedidos": pedidos}
+        for produto_id, quantidade, total, pedidos in linhas
+    ]
+
+
+@product_router.get("/{produto_id}", response_model=ProdutoOutSchema)
+async def get_product(produto_id: int, session: Session = Depends(get_session)):
+    """
+    Retorna um produto do catálogo pelo ID.
+    """
+    entry = catalog.get(session, produto_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Produto não encontrado")
+    return entry
+
+
+@product_router.post("", response_model=ProdutoOutSchema, status_code=201)
+async def create_product_route(
+    produto_schema: ProdutoSchema,
+    session: Session = Depends(get_session),
+    current_user: Usuario = Depends(get_current_user),
+):
+    """
+    Cadastra um produto no catálogo (somente admin).
+    """
+    _require_admin(current_user, "cadastrar produtos")
+    return create_product(session, produto_schema)
+
+
+@product_router.patch("/{produto_id}", response_model=ProdutoOutSchema)
+async def update_product_route(
+    produto_id: int,
+    produto_schema: ProdutoUpdateSchema,
+    session: Session = Depends(get_session),
+    current_user: Usuario = Depends(get_current_user),
+):
+    """
+    Altera nome, preço ou status de um produto (somente admin).
+    O novo preço vale para itens adicionados depois; itens existentes mantêm o preço da compra.
+    """
+    _require_admin(current_user, "alterar produtos")
+    return update_product(session, produto_id, produto_schema)
@@ -1,21 +1,31 @@
-from pydantic import BaseModel, conint, condecimal, ConfigDict
-from typing import Annotated
-from decimal import Decimal
+from pydantic import BaseModel, conint, ConfigDict, model_validator
+from typing import Annotated, Optional
+from utils.money import Money, PositiveMoney
 
 class ItemPedidoCreateSchema(BaseModel):
     # pedido_id não é necessário se vier na rota (ex.: /orders/{order_id}/add-item)
-    nome_produto: str
+    # Preferencial: produto_id (nome e preço vêm do catálogo).
+    # Legado: nome_produto + preco_unitario (nome fora do catálogo vira item avulso, sem produto_id).
+    produto_id: Optional[int] = None
+    nome_produto: Optional[str] = None
     quantidade: Annotated[int, conint(ge=1)]
-    preco_unitario: Annotated[Decimal, condecimal(gt=0)]
+    preco_unitario: Optional[PositiveMoney] = None
 
     model_config = ConfigDict(from_attributes=True)
 
+    @model_validator(mode="after")
+    def _exige_produto(self):
+        if self.produto_id is None and not self.nome_produto:
+            raise ValueError("Informe produto_id ou nome_produto")
+        return self
+
 class ItemPedidoOutSchema(BaseModel):
     id: int
     pedido_id: int
+    produto_id: Optional[int] = None
     nome_produto: str
     quantidade: int
-    preco_unitario: Decimal
-    subtotal: Decimal
+    preco_unitario: Money
+    subtotal: Money
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
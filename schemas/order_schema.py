@@ -1,10 +1,11 @@
-from pydantic import BaseModel, condecimal, ConfigDict
-from typing import Annotated
-from decimal import Decimal
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from typing import Annotated, Literal, Optional
+from models.pedido_model import StatusPedido
+from utils.money import Money, PositiveMoney
 
 
 class OrderSchema(BaseModel):
-    preco: Annotated[Decimal, condecimal(gt=0)]
+    preco: PositiveMoney
     model_config = ConfigDict(from_attributes=True)
 
 
@@ -12,5 +13,29 @@ class OrderOutSchema(BaseModel):
     pedido_id: int
     status: str
     usuario_id: int
-    preco: Decimal
+    preco: Money
     model_config = ConfigDict(from_attributes=True)
+
+
+class BulkStatusSchema(BaseModel):
+    # Informe `ids` e/ou algum filtro; pedidos CANCELADO/ENTREGUE nunca são alterados
+    status: StatusPedido
+    ids: Optional[Annotated[list[int], Field(min_length=1, max_length=1000)]] = None
+    usuario_id: Optional[int] = None
+    status_atual: Optional[StatusPedido] = None
+
+    @model_validator(mode="after")
+    def _exige_ids_ou_filtro(self):
+        if self.ids is None and self.usuario_id is None and self.status_atual is None:
+            raise ValueError("Informe ids ou ao menos um filtro (usuario_id, status_atual)")
+        return self
+
+
+class BulkStatusResultSchema(BaseModel):
+    pedido_id: int
+    resultado: Literal["atualizado", "nao_encontrado", "conflito"]
+
+
+class BulkStatusOutSchema(BaseModel):
+    atualizados: int
+    resultados: list[BulkStatusResultSchema]
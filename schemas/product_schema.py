@@ -0,0 +1,31 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from utils.money import Money, PositiveMoney
+
+
+class ProdutoSchema(BaseModel):
+    nome: str
+    preco: PositiveMoney
+    ativo: bool = True
+
+
+class ProdutoUpdateSchema(BaseModel):
+    nome: Optional[str] = None
+    preco: Optional[PositiveMoney] = None
+    ativo: Optional[bool] = None
+
+
+class ProdutoOutSchema(BaseModel):
+    produto_id: int
+    nome: str
+    preco: Money
+    ativo: bool
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ProdutoVendasSchema(BaseModel):
+    produto_id: int
+    nome: str
+    quantidade: int
+    total: Money
+    pedidos: int
@@ -0,0 +1,211 @@
+"""
+Entrypoint de produção.
+
+- App importado uma única vez no processo pai (preload) e compartilhado
+  com os workers via fork (copy-on-write): workers sobem rápido
+- Um socket de escuta (com --backlog) compartilhado por todos os workers
+- Workers reiniciados automaticamente se saírem inesperadamente, com backoff
+  quando morrem logo após subir; falha no startup (ex.: migrações não aplicadas)
+  ou quedas rápidas seguidas encerram o supervisor com status != 0
+- Engines descartadas após o fork: cada worker abre o próprio pool
+- uvloop/httptools quando instalados (uvicorn[standard])
+- O lifespan de cada worker aquece o pool de conexões e o contexto de senha
+
+Sem fork (Windows), usa o modo multiprocess do uvicorn (spawn, sem preload).
+
+Uso:
+    python -m server --workers 4 --port 8000
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import signal
+import sys
+import time
+from typing import Optional
+
+import uvicorn
+from uvicorn.config import STARTUP_FAILURE
+
+logger = logging.getLogger("server")
+
+
+def _default_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def _default_http() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+    parser.add_argument("--loop", default=os.getenv("SERVER_LOOP", _default_loop()))
+    parser.add_argument("--http", default=os.getenv("SERVER_HTTP", _default_http()))
+    parser.add_argument("--keep-alive", type=int, default=int(os.getenv("KEEP_ALIVE_SECONDS", "5")),
+                        help="segundos mantendo conexões ociosas abertas")
+    parser.add_argument("--backlog", type=int, default=int(os.getenv("SERVER_BACKLOG", "2048")),
+                        help="fila de conexões pendentes do socket de escuta")
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_TIMEOUT_SECONDS", "30")))
+    parser.add_argument("--no-access-log", action="store_true",
+                        default=os.getenv("ACCESS_LOG", "true").lower() != "true")
+    return parser.parse_args(argv)
+
+
+def build_config(args: argparse.Namespace, app) -> uvicorn.Config:
+    return uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        loop=args.loop,
+        http=args.http,
+        timeout_keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        access_log=not args.no_access_log,
+        lifespan="on",
+    )
+
+
+def _run_worker(config: uvicorn.Config, sock) -> None:
+    # Handlers do supervisor não valem no worker; o uvicorn instala os dele
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    server = uvicorn.Server(config)
+    status = 1
+    try:
+        server.run(sockets=[sock])
+        # Lifespan com erro: o uvicorn retorna sem levantar, com started=False
+        status = 0 if server.started else STARTUP_FAILURE
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        logger.exception("Worker %s falhou", os.getpid())
+    finally:
+        os._exit(status)
+
+
+class RestartPolicy:
+    """
+    Decide o que fazer quando um worker sai sem o supervisor ter pedido:
+    - falha no startup: não adianta reiniciar (None = encerrar tudo)
+    - saída antes de `min_uptime`: reinicia com backoff exponencial; após
+      `max_fast_failures` seguidas, desiste (None)
+    - worker que ficou de pé mais que `min_uptime`: reinicia na hora e zera a contagem
+    """
+
+    def __init__(self, min_uptime: float = 5.0, max_fast_failures: int = 5, max_delay: float = 30.0):
+        self.min_uptime = min_uptime
+        self.max_fast_failures = max_fast_failures
+        self.max_delay = max_delay
+        self.fast_failures = 0
+
+    def on_exit(self, exit_code: int, uptime: float) -> Optional[float]:
+        """Segundos de espera antes de reiniciar, ou None para encerrar o supervisor."""
+        if exit_code == STARTUP_FAILURE:
+            return None
+        if uptime >= self.min_uptime:
+            self.fast_failures = 0
+            return 0.0
+        self.fast_failures += 1
+        if self.fast_failures >= self.max_fast_failures:
+            return None
+        return min(0.5 * 2 ** (self.fast_failures - 1), self.max_delay)
+
+
+def serve_prefork(config: uvicorn.Config, workers: int, policy: Optional[RestartPolicy] = None) -> int:
+    """Supervisiona os workers até o SIGTERM/SIGINT (retorna 0) ou uma falha sem volta (retorna != 0)."""
+    from database.pool import dispose_engines_after_fork
+
+    policy = policy or RestartPolicy()
+    os.register_at_fork(after_in_child=dispose_engines_after_fork)
+    sock = config.bind_socket()
+    children: dict[int, float] = {}
+    stopping = False
+    exit_status = 0
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(config, sock)
+        children[pid] = time.monotonic()
+        logger.info("Worker %s iniciado", pid)
+
+    def stop_all() -> None:
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        stop_all()
+
+    def wait_or_stop(delay: float) -> None:
+        # Backoff interrompível: SIGTERM durante a espera não aguarda o prazo todo
+        fim = time.monotonic() + delay
+        while not stopping and time.monotonic() < fim:
+            time.sleep(0.1)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        iniciado_em = children.pop(pid, None)
+        if stopping or iniciado_em is None:
+            continue
+        exit_code = os.waitstatus_to_exitcode(status)
+        delay = policy.on_exit(exit_code, time.monotonic() - iniciado_em)
+        if delay is None:
+            logger.error("Worker %s saiu (status %s) sem conseguir ficar de pé; encerrando", pid, exit_code)
+            exit_status = exit_code if exit_code > 0 else 1
+            stopping = True
+            stop_all()
+            continue
+        logger.warning("Worker %s saiu (status %s); reiniciando em %.1fs", pid, exit_code, delay)
+        wait_or_stop(delay)
+        if not stopping:
+            spawn()
+    sock.close()
+    return exit_status
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(message)s")
+
+    if not hasattr(os, "fork"):
+        uvicorn.run(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            loop=args.loop,
+            http=args.http,
+            timeout_keep_alive=args.keep_alive,
+            backlog=args.backlog,
+            timeout_graceful_shutdown=args.graceful_timeout,
+            access_log=not args.no_access_log,
+        )
+        return
+
+    # Preload: importa app, rotas, modelos e contexto de senha antes do fork
+    from main import app
+
+    sys.exit(serve_prefork(build_config(args, app), max(1, args.workers)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,21 @@
-from utils.security import bcrypt_context
+from utils.security import bcrypt_context, dummy_verify_password
 from models.usuario_model import Usuario
 
 def user_auth(email: str, senha: str, session):
+    """
+    Autentica por email/senha. Faz trabalho de CPU (hash): chame fora do event loop.
+    """
     usuario = session.query(Usuario).filter(Usuario.email == email).first()
     if not usuario:
+        # Verifica contra hashes fictícios (um por esquema da política) para que
+        # email inexistente custe o mesmo que senha errada (evita enumeração por tempo)
+        dummy_verify_password(senha)
         return False
-    if not bcrypt_context.verify(senha, usuario.senha):
+    valido, novo_hash = bcrypt_context.verify_and_update(senha, usuario.senha)
+    if not valido:
         return False
-    return usuario
\ No newline at end of file
+    if novo_hash:
+        # Hash fora da política atual (esquema/custo): regrava com o padrão vigente
+        usuario.senha = novo_hash
+        session.commit()
+    return usuario
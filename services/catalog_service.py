@@ -0,0 +1,196 @@
+import os
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from threading import Lock
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import event, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.produto_model import Produto
+from models.item_pedido_model import ItensPedido
+from schemas.itemOrder_schema import ItemPedidoCreateSchema
+from schemas.product_schema import ProdutoSchema, ProdutoUpdateSchema
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    # None: item avulso do fluxo legado (nome fora do catálogo)
+    produto_id: Optional[int]
+    nome: str
+    preco: Decimal
+    ativo: bool
+
+    @classmethod
+    def from_model(cls, produto: Produto) -> "CatalogEntry":
+        return cls(produto.produto_id, produto.nome, produto.preco, bool(produto.ativo))
+
+
+class ProductCatalog:
+    """
+    Catálogo de produtos em memória (id -> entrada, nome -> id), na frente da tabela produtos.
+    - Preço do item é um lookup em dict (sem query por item)
+    - Mudanças feitas neste processo entram no cache após o commit
+    - Mudanças de outros workers aparecem no próximo recarregamento (`refresh_interval`)
+    - Miss consulta o banco (produto criado por outro worker ainda não recarregado)
+    """
+
+    def __init__(self, refresh_interval: float = 60.0):
+        self.refresh_interval = refresh_interval
+        self._por_id: dict[int, CatalogEntry] = {}
+        self._por_nome: dict[str, int] = {}
+        self._carregado_em: Optional[float] = None
+        self._lock = Lock()
+
+    def load(self, session: Session) -> int:
+        entries = [CatalogEntry.from_model(p) for p in session.query(Produto).all()]
+        with self._lock:
+            self._por_id = {e.produto_id: e for e in entries}
+            self._por_nome = {e.nome: e.produto_id for e in entries}
+            self._carregado_em = time.monotonic()
+        return len(entries)
+
+    def _ensure_fresh(self, session: Session) -> None:
+        if self._carregado_em is None or time.monotonic() - self._carregado_em > self.refresh_interval:
+            self.load(session)
+
+    def put(self, entry: CatalogEntry) -> None:
+        with self._lock:
+            antigo = self._por_id.get(entry.produto_id)
+            if antigo is not None and antigo.nome != entry.nome:
+                self._por_nome.pop(antigo.nome, None)
+            self._por_id[entry.produto_id] = entry
+            self._por_nome[entry.nome] = entry.produto_id
+
+    def get(self, session: Session, produto_id: int) -> Optional[CatalogEntry]:
+        self._ensure_fresh(session)
+        entry = self._por_id.get(produto_id)
+        if entry is None:
+            produto = session.get(Produto, produto_id)
+            if produto is not None:
+                entry = CatalogEntry.from_model(produto)
+                self.put(entry)
+        return entry
+
+    def find_by_name(self, session: Session, nome: str) -> Optional[CatalogEntry]:
+        self._ensure_fresh(session)
+        produto_id = self._por_nome.get(nome)
+        if produto_id is not None:
+            return self._por_id[produto_id]
+        produto = session.query(Produto).filter(Produto.nome == nome).first()
+        if produto is None:
+            return None
+        entry = CatalogEntry.from_model(produto)
+        self.put(entry)
+        return entry
+
+    def entries(self, session: Session) -> list[CatalogEntry]:
+        self._ensure_fresh(session)
+        return sorted(self._por_id.values(), key=lambda e: e.produto_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._por_id.clear()
+            self._por_nome.clear()
+            self._carregado_em = None
+
+
+catalog = ProductCatalog(refresh_interval=float(os.getenv("CATALOG_REFRESH_SECONDS", "60")))
+
+
+def _stage_catalog_change(session: Session, produto: Produto) -> None:
+    # Publica no cache somente após o commit (descartado em rollback)
+    session.flush()
+    session.info.setdefault("catalogo", []).append(CatalogEntry.from_model(produto))
+
+
+@event.listens_for(Session, "after_commit")
+def _refresh_catalog_after_commit(session: Session) -> None:
+    for entry in session.info.pop("catalogo", []):
+        catalog.put(entry)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_catalog_after_rollback(session: Session) -> None:
+    session.info.pop("catalogo", None)
+
+
+def _assert_valid_price(preco: Decimal) -> None:
+    if preco <= 0:
+        raise HTTPException(status_code=422, detail="Preço deve ser > 0")
+
+
+def create_product(session: Session, data: ProdutoSchema) -> Produto:
+    _assert_valid_price(data.preco)
+    produto = Produto(data.nome.strip(), data.preco, data.ativo)
+    session.add(produto)
+    try:
+        _stage_catalog_change(session, produto)
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Já existe um produto com este nome")
+    return produto
+
+
+def update_product(session: Session, produto_id: int, data: ProdutoUpdateSchema) -> Produto:
+    produto = session.get(Produto, produto_id)
+    if produto is None:
+        raise HTTPException(status_code=404, detail="Produto não encontrado")
+    if data.nome is not None:
+        produto.nome = data.nome.strip()
+    if data.preco is not None:
+        _assert_valid_price(data.preco)
+        produto.preco = data.preco
+    if data.ativo is not None:
+        produto.ativo = data.ativo
+    try:
+        _stage_catalog_change(session, produto)
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Já existe um produto com este nome")
+    return produto
+
+
+def resolve_item_product(session: Session, item_data: ItemPedidoCreateSchema) -> CatalogEntry:
+    """
+    Produto e preço de um novo item, pelo catálogo:
+    - produto_id: produto deve existir e estar ativo; o preço do cliente é ignorado
+    - nome_produto de produto existente: usa o preço do catálogo
+    - nome_produto fora do catálogo (fluxo legado): item avulso, sem produto_id, com o
+      preco_unitario informado. O catálogo não é alterado: só admin cadastra produtos
+    """
+    if item_data.produto_id is not None:
+        entry = catalog.get(session, item_data.produto_id)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Produto não encontrado")
+    else:
+        nome = item_data.nome_produto.strip()
+        entry = catalog.find_by_name(session, nome)
+        if entry is None:
+            if item_data.preco_unitario is None:
+                raise HTTPException(status_code=422, detail="Produto fora do catálogo: informe preco_unitario")
+            _assert_valid_price(item_data.preco_unitario)
+            return CatalogEntry(None, nome, item_data.preco_unitario, True)
+    if not entry.ativo:
+        raise HTTPException(status_code=409, detail="Produto inativo")
+    return entry
+
+
+def product_sales(session: Session) -> list[tuple[int, int, Decimal, int]]:
+    """Vendas agregadas por produto_id: (produto_id, quantidade, total, pedidos)."""
+    return (
+        session.query(
+            ItensPedido.produto_id,
+            func.sum(ItensPedido.quantidade),
+            func.sum(ItensPedido.subtotal),
+            func.count(func.distinct(ItensPedido.pedido_id)),
+        )
+        .filter(ItensPedido.produto_id.is_not(None))
+        .group_by(ItensPedido.produto_id)
+        .order_by(ItensPedido.produto_id)
+        .all()
+    )
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from threading import Lock
+from typing import Any, Callable, Optional
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.idempotency_model import IdempotencyKey
+from utils.clock import utcnow
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    escopo: str
+    fingerprint: str
+    status_code: int
+    corpo: Any
+    criado_em: Any
+
+
+class IdempotencyStore:
+    """
+    Respostas já concluídas por (usuario_id, chave), em um LRU na frente da
+    tabela idempotency_keys.
+    - Replays frequentes (retries do cliente) não vão ao banco
+    - A tabela é a fonte da verdade entre processos/reinícios e guarda a
+      reserva da chave enquanto o handler executa
+    """
+
+    def __init__(self, max_keys: int = 10_000, ttl: timedelta = timedelta(hours=24), lease: timedelta = timedelta(seconds=60)):
+        self._cache: OrderedDict[tuple[int, str], StoredResponse] = OrderedDict()
+        self._max_keys = max_keys
+        self._lock = Lock()
+        self.ttl = ttl
+        # Reserva mais antiga que isso é considerada abandonada (processo caiu no meio)
+        self.lease = lease
+
+    def get(self, key: tuple[int, str]) -> Optional[StoredResponse]:
+        with self._lock:
+            stored = self._cache.get(key)
+            if stored is not None:
+                self._cache.move_to_end(key)
+            return stored
+
+    def put(self, key: tuple[int, str], stored: StoredResponse) -> None:
+        with self._lock:
+            self._cache[key] = stored
+            self._cache.move_to_end(key)
+            if len(self._cache) > self._max_keys:
+                self._cache.popitem(last=False)
+
+    def discard(self, key: tuple[int, str]) -> None:
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+idempotency_store = IdempotencyStore(
+    max_keys=int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000")),
+    ttl=timedelta(hours=float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))),
+)
+
+
+def _fingerprint(escopo: str, payload: BaseModel) -> str:
+    return hashlib.sha256(f"{escopo}\n{payload.model_dump_json()}".encode()).hexdigest()
+
+
+def _replay(stored: StoredResponse, escopo: str, fingerprint: str) -> JSONResponse:
+    if stored.escopo != escopo or stored.fingerprint != fingerprint:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key já utilizada com outra requisição",
+        )
+    return JSONResponse(stored.corpo, status_code=stored.status_code, headers={REPLAY_HEADER: "true"})
+
+
+def _from_row(row: IdempotencyKey) -> StoredResponse:
+    return StoredResponse(row.escopo, row.fingerprint, row.status_code, json.loads(row.resposta), row.criado_em)
+
+
+def _find(session: Session, usuario_id: int, chave: str) -> Optional[IdempotencyKey]:
+    return (
+        session.query(IdempotencyKey)
+        .filter(IdempotencyKey.usuario_id == usuario_id, IdempotencyKey.chave == chave)
+        .first()
+    )
+
+
+def _reserve(session: Session, usuario_id: int, chave: str, escopo: str, fingerprint: str) -> tuple[Optional[StoredResponse], Any]:
+    """
+    Reserva a chave (commit próprio, antes do handler). Retorna (resposta armazenada, None)
+    se a chave já foi concluída, ou (None, marca da reserva); 409 se ainda está em processamento.
+    A marca (criado_em da reserva) identifica esta execução na gravação da resposta.
+    """
+    agora = utcnow()
+    row = _find(session, usuario_id, chave)
+    if row is not None:
+        expirada = row.criado_em < agora - idempotency_store.ttl
+        abandonada = row.status_code is None and row.criado_em < agora - idempotency_store.lease
+        if not (expirada or abandonada):
+            if row.status_code is None:
+                raise HTTPException(status_code=409, detail="Requisição com esta Idempotency-Key em processamento")
+            return _from_row(row), None
+        # Chave expirada/abandonada: reaproveita a linha para a nova execução
+        row.escopo, row.fingerprint, row.criado_em = escopo, fingerprint, agora
+        row.status_code = row.resposta = None
+        session.commit()
+        return None, agora
+
+    session.add(IdempotencyKey(usuario_id, chave, escopo, fingerprint, agora))
+    try:
+        session.commit()
+    except IntegrityError:
+        # Outra requisição reservou a mesma chave entre a leitura e o insert
+        session.rollback()
+        row = _find(session, usuario_id, chave)
+        if row is None or row.status_code is None:
+            raise HTTPException(status_code=409, detail="Requisição com esta Idempotency-Key em processamento")
+        return _from_row(row), None
+    return None, agora
+
+
+def _reservation(session: Session, usuario_id: int, chave: str, reservado_em):
+    # Somente a reserva desta execução: outra pode ter assumido a chave após o lease
+    return session.query(IdempotencyKey).filter(
+        IdempotencyKey.usuario_id == usuario_id,
+        IdempotencyKey.chave == chave,
+        IdempotencyKey.status_code.is_(None),
+        IdempotencyKey.criado_em == reservado_em,
+    )
+
+
+def _release(session: Session, usuario_id: int, chave: str, reservado_em) -> None:
+    # Falhou: libera a chave para que o retry do cliente execute de novo
+    session.rollback()
+    _reservation(session, usuario_id, chave, reservado_em).delete(synchronize_session=False)
+    session.commit()
+
+
+def run_idempotent(
+    *,
+    session: Session,
+    usuario_id: int,
+    chave: Optional[str],
+    escopo: str,
+    payload: BaseModel,
+    handler: Callable[[], Any],
+    response_model: type[BaseModel],
+    status_code: int = 200,
+) -> Any:
+    """
+    Executa `handler` no máximo uma vez por (usuario_id, Idempotency-Key).
+    O handler aplica as mudanças sem commit: o commit é feito aqui, na mesma
+    transação que grava a resposta (ou as duas coisas persistem, ou nenhuma).
+    - Sem chave: executa normalmente
+    - Chave já concluída com o mesmo corpo: devolve a resposta armazenada
+      (header Idempotent-Replayed), sem executar o handler
+    - Mesma chave com outro corpo/rota: 422; ainda em processamento: 409
+    - Erros (HTTPException inclusive) não são armazenados: a chave é liberada
+    - Execução que perdeu a reserva (lease vencido e outra assumiu) é desfeita: 409
+    """
+    if not chave:
+        result = handler()
+        session.commit()
+        return jsonable_encoder(response_model.model_validate(result))
+    if len(chave) > 255:
+        raise HTTPException(status_code=422, detail="Idempotency-Key muito longa (máximo 255 caracteres)")
+
+    key = (usuario_id, chave)
+    fingerprint = _fingerprint(escopo, payload)
+    stored = idempotency_store.get(key)
+    if stored is not None and stored.criado_em >= utcnow() - idempotency_store.ttl:
+        return _replay(stored, escopo, fingerprint)
+
+    stored, reservado_em = _reserve(session, usuario_id, chave, escopo, fingerprint)
+    if stored is not None:
+        idempotency_store.put(key, stored)
+        return _replay(stored, escopo, fingerprint)
+
+    try:
+        result = handler()
+        session.flush()
+        corpo = jsonable_encoder(response_model.model_validate(result))
+        # Resposta gravada na transação do handler, antes do commit
+        gravada = _reservation(session, usuario_id, chave, reservado_em).update(
+            {IdempotencyKey.status_code: status_code, IdempotencyKey.resposta: json.dumps(corpo)},
+            synchronize_session=False,
+        )
+        if not gravada:
+            session.rollback()
+            raise HTTPException(status_code=409, detail="Requisição com esta Idempotency-Key em processamento")
+        session.commit()
+    except BaseException:
+        _release(session, usuario_id, chave, reservado_em)
+        raise
+
+    idempotency_store.put(key, StoredResponse(escopo, fingerprint, status_code, corpo, reservado_em))
+    return corpo
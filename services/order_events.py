@@ -0,0 +1,136 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+from typing import AsyncIterator, Optional, Protocol
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.pedido_model import Pedido
+from models.outbox_model import EventoOutbox
+from utils.clock import utcnow
+
+
+@dataclass(frozen=True)
+class OrderEvent:
+    """Mudança em um pedido, publicada após o commit."""
+
+    tipo: str
+    pedido_id: int
+    usuario_id: int
+    status: str
+    preco: str
+    item_id: Optional[int] = None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    def to_sse(self) -> str:
+        return f"event: {self.tipo}\ndata: {self.to_json()}\n\n"
+
+
+class Subscription(Protocol):
+    async def get(self) -> OrderEvent:
+        ...
+
+
+class Broker(Protocol):
+    """
+    Pub/sub de eventos de pedidos.
+    A implementação em memória só entrega para assinantes do mesmo processo;
+    com vários workers, implemente esta interface sobre um broker compartilhado
+    (Redis pub/sub, Postgres LISTEN/NOTIFY...) e registre com `set_broker`.
+    """
+
+    def publish(self, event: OrderEvent) -> None:
+        ...
+
+    def subscribe(self, usuario_id: Optional[int]):
+        """Async context manager que entrega eventos do usuário (None = todos)."""
+        ...
+
+
+class _Subscriber:
+    def __init__(self, usuario_id: Optional[int], maxsize: int):
+        self.usuario_id = usuario_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[OrderEvent] = asyncio.Queue(maxsize=maxsize)
+
+    def matches(self, event: OrderEvent) -> bool:
+        return self.usuario_id is None or self.usuario_id == event.usuario_id
+
+    def put(self, event: OrderEvent) -> None:
+        # Consumidor lento: descarta o evento mais antigo em vez de crescer sem limite
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self) -> OrderEvent:
+        return await self.queue.get()
+
+
+class InMemoryBroker:
+    def __init__(self, queue_size: int = 100):
+        self._subscribers: set[_Subscriber] = set()
+        self._queue_size = queue_size
+
+    def publish(self, event: OrderEvent) -> None:
+        # Pode ser chamado do threadpool: entrega no loop de cada assinante
+        for subscriber in list(self._subscribers):
+            if subscriber.matches(event):
+                subscriber.loop.call_soon_threadsafe(subscriber.put, event)
+
+    @asynccontextmanager
+    async def subscribe(self, usuario_id: Optional[int]) -> AsyncIterator[_Subscriber]:
+        subscriber = _Subscriber(usuario_id, self._queue_size)
+        self._subscribers.add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            self._subscribers.discard(subscriber)
+
+
+broker: Broker = InMemoryBroker()
+
+
+def set_broker(new_broker: Broker) -> None:
+    global broker
+    broker = new_broker
+
+
+def record_order_event(session: Session, tipo: str, pedido: Pedido, item_id: Optional[int] = None) -> OrderEvent:
+    """
+    Registra a mudança de um pedido na transação corrente (chamar antes do commit):
+    - grava o evento na outbox, atomicamente com a mudança
+    - publica no broker somente após o commit (descartado em rollback)
+    """
+    if pedido.pedido_id is None:
+        session.flush()
+    order_event = OrderEvent(
+        tipo=tipo,
+        pedido_id=pedido.pedido_id,
+        usuario_id=pedido.usuario_id,
+        status=pedido.status.value,
+        preco=str(pedido.preco),
+        item_id=item_id,
+    )
+    stage_order_events(session, [order_event])
+    return order_event
+
+
+def stage_order_events(session: Session, order_events: list[OrderEvent]) -> None:
+    """Versão em lote de record_order_event para eventos já montados."""
+    agora = utcnow()
+    session.add_all([EventoOutbox(e.tipo, e.pedido_id, e.to_json(), agora) for e in order_events])
+    session.info.setdefault("order_events", []).extend(order_events)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session) -> None:
+    for order_event in session.info.pop("order_events", []):
+        broker.publish(order_event)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop("order_events", None)
@@ -1,12 +1,17 @@
+import heapq
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, update, select
 from decimal import Decimal
+from typing import Optional, Union
 from fastapi import HTTPException
 
 from models.pedido_model import Pedido, StatusPedido
 from models.item_pedido_model import ItensPedido
+from models.pedido_arquivo_model import PedidoArquivo
 from models.usuario_model import Usuario
 from schemas.itemOrder_schema import ItemPedidoCreateSchema, ItemPedidoOutSchema
+from services.catalog_service import resolve_item_product
+from services.order_events import OrderEvent, record_order_event, stage_order_events
 
 
 def _get_order_or_404(session: Session, order_id: int) -> Pedido:
@@ -20,18 +25,56 @@ def _get_order_or_404(session: Session, order_id: int) -> Pedido:
     return pedido
 
 
+def find_order(session: Session, order_id: int) -> Optional[Union[Pedido, PedidoArquivo]]:
+    """Pedido pelo id nas tabelas quentes ou, se já arquivado, no arquivo (somente leitura)."""
+    pedido = session.query(Pedido).filter(Pedido.pedido_id == order_id).first()
+    if pedido is None:
+        pedido = session.get(PedidoArquivo, order_id)
+    return pedido
+
+
+def find_orders(session: Session, usuario_id: Optional[int] = None, arquivados: bool = False) -> list:
+    """
+    Pedidos por id (de um usuário ou todos). Somente as tabelas quentes, a menos
+    que `arquivados`: então inclui os pedidos movidos para o arquivo.
+    """
+    por_tabela = []
+    for model in (Pedido, PedidoArquivo) if arquivados else (Pedido,):
+        query = session.query(model)
+        if usuario_id is not None:
+            query = query.filter(model.usuario_id == usuario_id)
+        por_tabela.append(query.order_by(model.pedido_id).all())
+    return list(heapq.merge(*por_tabela, key=lambda p: p.pedido_id))
+
+
+def find_order_items(session: Session, pedido: Union[Pedido, PedidoArquivo]) -> list:
+    """Itens do pedido, da tabela correspondente (quente ou arquivo)."""
+    if isinstance(pedido, PedidoArquivo):
+        return list(pedido.itens)
+    return (
+        session.query(ItensPedido)
+        .filter(ItensPedido.pedido_id == pedido.pedido_id)
+        .all()
+    )
+
+
 def _assert_order_permission(current_user: Usuario, pedido: Pedido, action: str) -> None:
     if not (current_user.admin or pedido.usuario_id == current_user.usuario_id):
         raise HTTPException(status_code=403, detail=f"Sem permissão para {action} neste pedido")
 
 
+# Estados finais: pedido não muda mais
+TERMINAL_STATUSES = (StatusPedido.CANCELADO, StatusPedido.ENTREGUE)
+
+
 def _assert_order_modifiable(pedido: Pedido, action: str) -> None:
     # Restringe operações de modificação em estados finais
-    if pedido.status in {StatusPedido.CANCELADO, StatusPedido.ENTREGUE}:
+    if pedido.status in TERMINAL_STATUSES:
         raise HTTPException(status_code=409, detail=f"Não é possível {action} em um pedido {pedido.status.value}")
 
 
 def _recalc_order_total(session: Session, order_id: int) -> Decimal:
+    # SUM em centavos inteiros no banco (exato); uma conversão para Decimal no resultado
     total = (
         session.query(func.sum(ItensPedido.subtotal))
         .filter(ItensPedido.pedido_id == order_id)
@@ -52,8 +95,10 @@ def add_item_to_order(
     - Pedido deve existir
     - Permissão: admin ou dono do pedido
     - Não permitir quando status == CANCELADO
-    - Calcular subtotal no servidor quando ausente
+    - Produto e preço unitário vêm do catálogo (cache em memória)
+    - Calcular subtotal no servidor
     - Atualizar o total do pedido (preco) incrementalmente
+    Não faz commit: a transação é confirmada por quem chama.
     """
     pedido = _get_order_or_404(session, order_id)
     _assert_order_permission(current_user, pedido, "adicionar item")
@@ -62,15 +107,15 @@ def add_item_to_order(
     # Sempre calcular subtotal no servidor para evitar manipulação do cliente
     if item_data.quantidade < 1:
         raise HTTPException(status_code=422, detail="Quantidade deve ser >= 1")
-    if item_data.preco_unitario <= 0:
-        raise HTTPException(status_code=422, detail="Preço unitário deve ser > 0")
-    subtotal = item_data.quantidade * item_data.preco_unitario
+    produto = resolve_item_product(session, item_data)
+    subtotal = item_data.quantidade * produto.preco
 
     novo_item = ItensPedido(
         pedido_id=order_id,
-        nome_produto=item_data.nome_produto,
+        produto_id=produto.produto_id,
+        nome_produto=produto.nome,
         quantidade=item_data.quantidade,
-        preco_unitario=item_data.preco_unitario,
+        preco_unitario=produto.preco,
         subtotal=subtotal,
     )
     session.add(novo_item)
@@ -80,9 +125,8 @@ def add_item_to_order(
     # Recalcula o total do pedido diretamente no banco (evita drift e cache)
     pedido.preco = _recalc_order_total(session, order_id)
     session.add(pedido)
-
-    session.commit()
-    session.refresh(novo_item)
+    record_order_event(session, "item_adicionado", pedido, item_id=novo_item.id)
+    # Sem commit: quem chama (run_idempotent) confirma junto com a resposta armazenada
     return novo_item
 
 
@@ -116,11 +160,11 @@ def remove_item_from_order(
     removed_data = {
         "id": int(item.id),
         "pedido_id": int(item.pedido_id),
+        "produto_id": item.produto_id,
         "nome_produto": str(item.nome_produto),
         "quantidade": int(item.quantidade),
-        # Garante materialização segura de Numeric -> Decimal
-        "preco_unitario": Decimal(str(item.preco_unitario)),
-        "subtotal": Decimal(str(item.subtotal)),
+        "preco_unitario": item.preco_unitario,
+        "subtotal": item.subtotal,
     }
 
     # Deleta via query para evitar problemas de estado da instância deletada
@@ -134,6 +178,69 @@ def remove_item_from_order(
     # Recalcula o total do pedido diretamente no banco
     pedido.preco = _recalc_order_total(session, order_id)
     session.add(pedido)
+    record_order_event(session, "item_removido", pedido, item_id=item_id)
 
     session.commit()
     return ItemPedidoOutSchema(**removed_data)
+
+
+def bulk_update_status(
+    *,
+    session: Session,
+    novo_status: StatusPedido,
+    ids: Optional[list[int]] = None,
+    usuario_id: Optional[int] = None,
+    status_atual: Optional[StatusPedido] = None,
+) -> tuple[list[int], list[int]]:
+    """
+    Transição de status em lote com um único UPDATE condicional:
+    - Só altera pedidos fora dos estados finais (CANCELADO, ENTREGUE)
+    - Filtra por ids e/ou usuario_id/status_atual
+    - Grava os eventos na outbox na mesma transação (um commit)
+    Retorna (ids atualizados, ids informados que existem mas estão em estado final).
+    """
+    condicoes = [Pedido.status.not_in(TERMINAL_STATUSES)]
+    if ids is not None:
+        condicoes.append(Pedido.pedido_id.in_(ids))
+    if usuario_id is not None:
+        condicoes.append(Pedido.usuario_id == usuario_id)
+    if status_atual is not None:
+        condicoes.append(Pedido.status == status_atual)
+
+    atualizados = session.execute(
+        update(Pedido)
+        .where(*condicoes)
+        .values(status=novo_status)
+        .returning(Pedido.pedido_id, Pedido.usuario_id, Pedido.preco)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    conflitos: list[int] = []
+    restantes = set(ids or []) - {row.pedido_id for row in atualizados}
+    if restantes:
+        conflitos = list(
+            session.execute(select(Pedido.pedido_id).where(Pedido.pedido_id.in_(restantes))).scalars()
+        )
+
+    stage_order_events(session, [
+        OrderEvent("status_alterado", row.pedido_id, row.usuario_id, novo_status.value, str(row.preco))
+        for row in atualizados
+    ])
+    session.commit()
+    return sorted(row.pedido_id for row in atualizados), conflitos
+
+
+def bulk_status_results(ids: Optional[list[int]], atualizados: list[int], conflitos: list[int]) -> list[dict]:
+    """Resultado por id: na ordem informada (modo ids) ou só os atualizados (modo filtro)."""
+    if ids is None:
+        return [{"pedido_id": pedido_id, "resultado": "atualizado"} for pedido_id in atualizados]
+    atualizados_set, conflitos_set = set(atualizados), set(conflitos)
+    return [
+        {
+            "pedido_id": pedido_id,
+            "resultado": "atualizado" if pedido_id in atualizados_set
+            else "conflito" if pedido_id in conflitos_set
+            else "nao_encontrado",
+        }
+        for pedido_id in dict.fromkeys(ids)
+    ]
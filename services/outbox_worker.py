@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import timedelta
+from typing import Callable, Iterable
+from sqlalchemy import delete, select, update
+from sqlalchemy.engine import Engine
+
+from database.connection import db
+from database import sharding
+from models.outbox_model import EventoOutbox
+from utils.clock import utcnow
+
+logger = logging.getLogger(__name__)
+
+outbox = EventoOutbox.__table__
+
+# Handlers por tipo de evento ("*" recebe todos). Recebem o payload (dict) e
+# devem ser idempotentes: a entrega é at-least-once.
+_handlers: dict[str, list[Callable[[dict], None]]] = {}
+
+
+def register_handler(tipo: str, handler: Callable[[dict], None]) -> None:
+    _handlers.setdefault(tipo, []).append(handler)
+
+
+def outbox_handler(tipo: str = "*"):
+    """Decorator para registrar um handler de eventos da outbox."""
+    def decorator(handler: Callable[[dict], None]) -> Callable[[dict], None]:
+        register_handler(tipo, handler)
+        return handler
+    return decorator
+
+
+def _dispatch(tipo: str, payload: dict) -> None:
+    for handler in _handlers.get(tipo, []) + _handlers.get("*", []):
+        handler(payload)
+
+
+class OutboxWorker:
+    """
+    Drena a outbox em lotes, fora do caminho dos requests.
+    - Reivindica o lote com um UPDATE ... RETURNING (lease), seguro com vários processos
+    - Sucesso: marca processado_em; falha: backoff exponencial até `max_attempts`
+    - Eventos que esgotam as tentativas ficam na tabela com `ultimo_erro` para análise
+    - Processados há mais de `retention` são apagados (a cada `purge_interval`), em lotes
+    """
+
+    def __init__(
+        self,
+        engines: Callable[[], Iterable[Engine]],
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        max_attempts: int = 5,
+        lease: timedelta = timedelta(seconds=60),
+        retention: timedelta = timedelta(hours=24),
+        purge_interval: float = 60.0,
+    ):
+        self.engines = engines
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.retention = retention
+        self.purge_interval = purge_interval
+        self._task: asyncio.Task | None = None
+
+    def _claim(self, engine: Engine) -> list:
+        agora = utcnow()
+        pendentes = (
+            select(outbox.c.id)
+            .where(
+                outbox.c.processado_em.is_(None),
+                outbox.c.proxima_tentativa_em <= agora,
+                outbox.c.tentativas < self.max_attempts,
+            )
+            .order_by(outbox.c.id)
+            .limit(self.batch_size)
+        )
+        with engine.begin() as conn:
+            rows = conn.execute(
+                update(outbox)
+                .where(outbox.c.id.in_(pendentes.scalar_subquery()))
+                .values(proxima_tentativa_em=agora + self.lease)
+                .returning(outbox.c.id, outbox.c.tipo, outbox.c.payload, outbox.c.tentativas)
+            ).all()
+        return sorted(rows, key=lambda row: row.id)
+
+    def _backoff(self, tentativas: int) -> timedelta:
+        return timedelta(seconds=min(2 ** tentativas, 300))
+
+    def drain_once(self) -> int:
+        """Processa um lote de cada banco. Retorna quantos eventos foram tentados."""
+        total = 0
+        for engine in self.engines():
+            rows = self._claim(engine)
+            total += len(rows)
+            processados, falhas = [], []
+            for row in rows:
+                try:
+                    _dispatch(row.tipo, json.loads(row.payload))
+                    processados.append(row.id)
+                except Exception as e:
+                    logger.exception("Falha ao processar evento %s da outbox", row.id)
+                    tentativas = row.tentativas + 1
+                    falhas.append((row.id, {
+                        "tentativas": tentativas,
+                        "proxima_tentativa_em": utcnow() + self._backoff(tentativas),
+                        "ultimo_erro": repr(e),
+                    }))
+            with engine.begin() as conn:
+                if processados:
+                    conn.execute(
+                        update(outbox)
+                        .where(outbox.c.id.in_(processados))
+                        .values(processado_em=utcnow(), ultimo_erro=None)
+                    )
+                for evento_id, values in falhas:
+                    conn.execute(update(outbox).where(outbox.c.id == evento_id).values(**values))
+        return total
+
+    def purge_processed(self) -> int:
+        """Apaga eventos processados há mais de `retention`. Retorna quantos foram apagados."""
+        limite = utcnow() - self.retention
+        total = 0
+        for engine in self.engines():
+            while True:
+                # Lotes curtos: não segura o lock de escrita do SQLite por muito tempo
+                antigos = (
+                    select(outbox.c.id)
+                    .where(outbox.c.processado_em < limite)
+                    .limit(self.batch_size)
+                )
+                with engine.begin() as conn:
+                    apagados = conn.execute(delete(outbox).where(outbox.c.id.in_(antigos.scalar_subquery()))).rowcount
+                total += apagados
+                if apagados < self.batch_size:
+                    break
+        return total
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        proxima_limpeza = loop.time()
+        while True:
+            try:
+                processados = await asyncio.to_thread(self.drain_once)
+            except Exception:
+                logger.exception("Erro ao drenar a outbox")
+                processados = 0
+            if loop.time() >= proxima_limpeza:
+                proxima_limpeza = loop.time() + self.purge_interval
+                try:
+                    await asyncio.to_thread(self.purge_processed)
+                except Exception:
+                    logger.exception("Erro ao limpar eventos processados da outbox")
+            # Lote cheio: provavelmente há mais pendentes, continua sem esperar
+            if processados < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def _outbox_engines() -> list[Engine]:
+    # Com shards, a outbox vive junto dos pedidos em cada shard
+    return sharding.shard_dbs or [db]
+
+
+outbox_worker = OutboxWorker(
+    engines=_outbox_engines,
+    batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", "100")),
+    poll_interval=float(os.getenv("OUTBOX_POLL_SECONDS", "1")),
+    max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5")),
+    retention=timedelta(hours=float(os.getenv("OUTBOX_RETENTION_HOURS", "24"))),
+)
@@ -0,0 +1,54 @@
+import re
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import column, func, literal_column, table
+from sqlalchemy.orm import Session
+
+from database.fulltext import ITEM_SEARCH_TABLE
+from models.pedido_model import Pedido
+from models.item_pedido_model import ItensPedido
+
+_fts = table(ITEM_SEARCH_TABLE, column("rowid"))
+_fts_ref = literal_column(ITEM_SEARCH_TABLE)
+
+# Máximo de termos por busca (cada termo vira um prefixo no MATCH)
+MAX_SEARCH_TERMS = 8
+
+
+def build_match_query(termo: str) -> str:
+    """
+    Converte o texto do usuário em uma query FTS5 segura:
+    cada palavra vira um prefixo entre aspas ("piz"* "cal"*), combinados com AND.
+    Operadores/sintaxe FTS do cliente nunca chegam ao MATCH.
+    """
+    palavras = re.findall(r"\w+", termo)[:MAX_SEARCH_TERMS]
+    if not palavras:
+        raise HTTPException(status_code=422, detail="Informe ao menos uma palavra para buscar")
+    return " ".join(f'"{palavra}"*' for palavra in palavras)
+
+
+def search_items(
+    session: Session,
+    match: str,
+    usuario_id: Optional[int],
+    limit: int,
+    offset: int = 0,
+) -> list[tuple[float, ItensPedido]]:
+    """
+    Itens cujo nome_produto casa com `match`, do mais relevante (bm25) ao menos.
+    `usuario_id` restringe aos pedidos do usuário (None = todos).
+    Retorna (rank, item); rank menor = mais relevante.
+    """
+    rank = func.bm25(_fts_ref)
+    query = (
+        session.query(rank.label("rank"), ItensPedido)
+        .select_from(_fts)
+        .join(ItensPedido, ItensPedido.id == _fts.c.rowid)
+        .filter(_fts_ref.op("MATCH")(match))
+    )
+    if usuario_id is not None:
+        query = query.join(Pedido, Pedido.pedido_id == ItensPedido.pedido_id).filter(Pedido.usuario_id == usuario_id)
+    return [
+        (row.rank, row.ItensPedido)
+        for row in query.order_by(rank, ItensPedido.id).limit(limit).offset(offset).all()
+    ]
@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from uuid import uuid4
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from models.refresh_token_model import RefreshToken
+from utils.security import create_refresh_token, REFRESH_TOKEN_EXPIRE_DAYS
+from utils.clock import utcnow
+
+
+class RevokedTokenCache:
+    """
+    Conjunto em memória de jti revogados, na frente da tabela refresh_tokens.
+    - Checagem de revogação é um lookup em dict (sem query)
+    - Entradas expiradas são descartadas periodicamente (o token já não seria aceito)
+    - A tabela continua sendo a fonte da verdade entre processos/reinícios
+    """
+
+    PURGE_INTERVAL = timedelta(hours=1)
+
+    def __init__(self):
+        self._jtis: dict[str, datetime] = {}
+        self._lock = Lock()
+        self._last_purge = utcnow()
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self._jtis
+
+    def __len__(self) -> int:
+        return len(self._jtis)
+
+    def add(self, jti: str, expira_em: datetime) -> None:
+        with self._lock:
+            self._jtis[jti] = expira_em
+            if utcnow() - self._last_purge > self.PURGE_INTERVAL:
+                self._purge_expired()
+
+    def load(self, session: Session) -> int:
+        """Carrega do banco os jti revogados e ainda não expirados."""
+        rows = (
+            session.query(RefreshToken.jti, RefreshToken.expira_em)
+            .filter(RefreshToken.revogado.is_(True), RefreshToken.expira_em > utcnow())
+            .all()
+        )
+        with self._lock:
+            self._jtis = {jti: expira_em for jti, expira_em in rows}
+            self._last_purge = utcnow()
+        return len(self._jtis)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._jtis.clear()
+
+    def _purge_expired(self) -> None:
+        now = utcnow()
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > now}
+        self._last_purge = now
+
+
+revoked_tokens = RevokedTokenCache()
+
+
+def _invalid_token() -> HTTPException:
+    return HTTPException(status_code=401, detail="Token invalido.", headers={"WWW-Authenticate": "Bearer"})
+
+
+def issue_refresh_token(session: Session, usuario_id: int) -> str:
+    """Emite um refresh token com jti e o registra no store."""
+    jti = uuid4().hex
+    expira_em = utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    token = create_refresh_token(
+        {"sub": str(usuario_id), "jti": jti},
+        expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    session.add(RefreshToken(jti, usuario_id, expira_em))
+    session.commit()
+    return token
+
+
+def _mark_revoked(session: Session, jti: str) -> bool:
+    # UPDATE condicional: só um request consegue revogar (e portanto rotacionar) o mesmo jti
+    updated = (
+        session.query(RefreshToken)
+        .filter(RefreshToken.jti == jti, RefreshToken.revogado.is_(False))
+        .update({"revogado": True, "revogado_em": utcnow()}, synchronize_session=False)
+    )
+    return updated == 1
+
+
+def _payload_expiration(payload: dict) -> datetime:
+    return datetime.fromtimestamp(payload["exp"], timezone.utc).replace(tzinfo=None)
+
+
+def revoke_refresh_token(session: Session, payload: dict) -> bool:
+    """Revoga o refresh token do payload. Retorna False se já estava revogado/desconhecido."""
+    jti = payload.get("jti")
+    if not jti:
+        raise _invalid_token()
+    revoked = _mark_revoked(session, jti)
+    session.commit()
+    revoked_tokens.add(jti, _payload_expiration(payload))
+    return revoked
+
+
+def revoke_all_refresh_tokens(session: Session, usuario_id: int) -> int:
+    """Revoga todos os refresh tokens ativos de um usuário. Retorna quantos foram revogados."""
+    ativos = (
+        session.query(RefreshToken.jti, RefreshToken.expira_em)
+        .filter(
+            RefreshToken.usuario_id == usuario_id,
+            RefreshToken.revogado.is_(False),
+            RefreshToken.expira_em > utcnow(),
+        )
+        .all()
+    )
+    if not ativos:
+        return 0
+    (
+        session.query(RefreshToken)
+        .filter(RefreshToken.jti.in_([jti for jti, _ in ativos]))
+        .update({"revogado": True, "revogado_em": utcnow()}, synchronize_session=False)
+    )
+    session.commit()
+    for jti, expira_em in ativos:
+        revoked_tokens.add(jti, expira_em)
+    return len(ativos)
+
+
+def rotate_refresh_token(session: Session, payload: dict) -> str:
+    """
+    Rotaciona um refresh token:
+    - Rejeita tokens sem jti ou já revogados (checagem em memória, sem query)
+    - Revoga o jti atual com UPDATE condicional e emite um novo token
+    - Reuso de um token já rotacionado revoga todos os tokens do usuário
+    """
+    jti = payload.get("jti")
+    try:
+        usuario_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
+        raise _invalid_token()
+    if not jti:
+        raise _invalid_token()
+
+    if jti in revoked_tokens or not _mark_revoked(session, jti):
+        # Token reapresentado após rotação/logout: possível vazamento
+        session.rollback()
+        revoke_all_refresh_tokens(session, usuario_id)
+        raise _invalid_token()
+
+    revoked_tokens.add(jti, _payload_expiration(payload))
+    return issue_refresh_token(session, usuario_id)
@@ -0,0 +1,141 @@
+import os
+
+# Valores padrão para rodar a suíte sem .env
+os.environ.setdefault("SECRET_KEY", "chave-de-teste")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+# Custos mínimos de hash: a suíte testa o fluxo, não a força do hash
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("ARGON2_MEMORY_COST", "1024")
+os.environ.setdefault("ARGON2_TIME_COST", "1")
+
+import pytest
+from fastapi import Response
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.orm import Session
+
+from main import app
+from database.connection import Base
+from database.dependencies import get_session, read_your_writes
+from services.token_service import revoked_tokens
+from utils.rate_limit import login_rate_limiter
+from database import sharding
+from services.idempotency_service import idempotency_store
+from services.catalog_service import catalog
+from routes.order_routes import order_reads
+from factories import Seeder
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "commits: o código testado abre as próprias transações no `engine` (worker, "
+        "arquivamento...); o teste ganha um banco só dele em vez do SAVEPOINT",
+    )
+
+
+def _memory_engine():
+    # Banco em memória compartilhado entre conexões/threads
+    return create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+
+@pytest.fixture(scope="session")
+def worker_engine():
+    # Um banco por processo: cada worker do pytest-xdist (-n auto) tem o próprio
+    engine = _memory_engine()
+
+    # O pysqlite abre/fecha transações por conta própria e quebra SAVEPOINT:
+    # o BEGIN passa a ser emitido pelo SQLAlchemy
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    # Schema criado uma vez por worker
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def engine(request, worker_engine):
+    if not request.node.get_closest_marker("commits"):
+        yield worker_engine
+        return
+    # Código que abre as próprias transações no engine não cabe no SAVEPOINT
+    # do teste: banco próprio, com schema criado só para ele
+    engine = _memory_engine()
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def reset_in_memory_state():
+    # Estado em memória não pode vazar entre testes
+    revoked_tokens.clear()
+    login_rate_limiter.backend.clear()
+    sharding._order_owner_cache.clear()
+    idempotency_store.clear()
+    catalog.clear()
+    order_reads.clear()
+    yield
+    revoked_tokens.clear()
+    login_rate_limiter.backend.clear()
+    sharding._order_owner_cache.clear()
+    idempotency_store.clear()
+    catalog.clear()
+    order_reads.clear()
+
+
+@pytest.fixture()
+def db_session(request, engine):
+    if request.node.get_closest_marker("commits"):
+        session = Session(bind=engine)
+        try:
+            yield session
+        finally:
+            session.close()
+        return
+
+    # Teste inteiro numa transação desfeita ao final; commits do app viram
+    # RELEASE de SAVEPOINT e nada fica no banco do worker
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture()
+def seed(db_session):
+    # Carga em massa (usuários/produtos/pedidos/itens); ver tests/factories.py
+    return Seeder(db_session)
+
+
+@pytest.fixture()
+def client(db_session):
+    # Override da sessão do app para usar o banco de teste
+    def override_get_session(response: Response):
+        with read_your_writes(db_session, response):
+            yield db_session
+
+    app.dependency_overrides[get_session] = override_get_session
+    c = TestClient(app)
+    try:
+        yield c
+    finally:
+        app.dependency_overrides.pop(get_session, None)
@@ -0,0 +1,109 @@
+"""
+Carga em massa para testes: INSERT em lote (executemany) direto nas tabelas,
+sem passar pelas rotas nem pelo unit of work do ORM. Serve para montar bases
+grandes em testes funcionais e de desempenho sem pagar um request por linha.
+"""
+from decimal import Decimal
+from itertools import count, cycle
+from typing import Optional
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from models.usuario_model import Usuario
+from models.produto_model import Produto
+from models.pedido_model import Pedido, StatusPedido
+from models.item_pedido_model import ItensPedido
+
+
+class Seeder:
+    """Cada método insere em lote, faz commit e devolve os ids na ordem das linhas."""
+
+    def __init__(self, session: Session):
+        self.session = session
+        # Sufixo único de e-mails/nomes entre chamadas do mesmo teste
+        self._seq = count(1)
+
+    def _insert(self, model, pk, rows: list[dict]) -> list[int]:
+        if not rows:
+            return []
+        ids = list(self.session.scalars(insert(model).returning(pk, sort_by_parameter_order=True), rows))
+        self.session.commit()
+        return ids
+
+    def users(self, n: int, *, admin: bool = False, ativo: bool = True, senha: str = "hash") -> list[int]:
+        rows = []
+        for _ in range(n):
+            i = next(self._seq)
+            rows.append({"nome": f"user{i}", "email": f"user{i}@seed.test", "senha": senha, "ativo": ativo, "admin": admin})
+        return self._insert(Usuario, Usuario.usuario_id, rows)
+
+    def products(self, n: int, *, preco: Decimal = Decimal("10.00")) -> list[int]:
+        rows = [{"nome": f"Produto {next(self._seq)}", "preco": preco, "ativo": True} for _ in range(n)]
+        return self._insert(Produto, Produto.produto_id, rows)
+
+    def orders(
+        self,
+        usuarios_ids: list[int],
+        por_usuario: int = 1,
+        *,
+        status: StatusPedido = StatusPedido.PENDENTE,
+    ) -> list[int]:
+        # Total zerado: items() recalcula o preço dos pedidos que recebem itens
+        rows = [
+            {"usuario_id": usuario_id, "preco": Decimal("0.00"), "status": status}
+            for usuario_id in usuarios_ids
+            for _ in range(por_usuario)
+        ]
+        return self._insert(Pedido, Pedido.pedido_id, rows)
+
+    def items(
+        self,
+        pedidos_ids: list[int],
+        por_pedido: int = 1,
+        *,
+        produtos_ids: Optional[list[int]] = None,
+        quantidade: int = 1,
+        preco_unitario: Decimal = Decimal("10.00"),
+    ) -> list[int]:
+        """
+        Itens distribuídos em rodízio entre `produtos_ids` (nome e preço do catálogo);
+        sem produtos, itens avulsos "Item N" com `preco_unitario`.
+        """
+        if produtos_ids:
+            catalogo = {
+                p.produto_id: (p.nome, p.preco)
+                for p in self.session.query(Produto).filter(Produto.produto_id.in_(produtos_ids))
+            }
+            produtos = cycle([(produto_id, *catalogo[produto_id]) for produto_id in produtos_ids])
+        else:
+            produtos = None
+
+        rows = []
+        for pedido_id in pedidos_ids:
+            for _ in range(por_pedido):
+                if produtos:
+                    produto_id, nome, preco = next(produtos)
+                else:
+                    produto_id, nome, preco = None, f"Item {next(self._seq)}", preco_unitario
+                rows.append({
+                    "pedido_id": pedido_id,
+                    "produto_id": produto_id,
+                    "nome_produto": nome,
+                    "quantidade": quantidade,
+                    "preco_unitario": preco,
+                    "subtotal": preco * quantidade,
+                })
+        ids = self._insert(ItensPedido, ItensPedido.id, rows)
+
+        # Total de cada pedido = soma dos subtotais, em um único UPDATE
+        total = (
+            select(func.coalesce(func.sum(ItensPedido.subtotal), 0))
+            .where(ItensPedido.pedido_id == Pedido.pedido_id)
+            .scalar_subquery()
+        )
+        self.session.execute(
+            update(Pedido).where(Pedido.pedido_id.in_(pedidos_ids)).values(preco=total),
+            execution_options={"synchronize_session": False},
+        )
+        self.session.commit()
+        return ids
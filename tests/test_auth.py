@@ -0,0 +1,203 @@
+import pytest
+
+from models.refresh_token_model import RefreshToken
+
+
+def _create_and_login(client, email="auth@test.com", senha="segredo123"):
+    res = client.post("/auth/create_account", json={"nome": "auth", "email": email, "senha": senha})
+    assert res.status_code == 201
+    login = client.post("/auth/login", json={"email": email, "senha": senha})
+    assert login.status_code == 200
+    return login.json()
+
+
+def _bearer(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_refresh_rotates_and_rejects_reused_token(client, db_session):
+    tokens = _create_and_login(client)
+    old_refresh = tokens["refresh_token"]
+
+    res = client.post("/auth/refresh_token", headers=_bearer(old_refresh))
+    assert res.status_code == 200
+    new_refresh = res.json()["refresh_token"]
+    assert new_refresh != old_refresh
+
+    # Reuso do token rotacionado → 401 e revogação de toda a família do usuário
+    reuse = client.post("/auth/refresh_token", headers=_bearer(old_refresh))
+    assert reuse.status_code == 401
+    after_reuse = client.post("/auth/refresh_token", headers=_bearer(new_refresh))
+    assert after_reuse.status_code == 401
+
+    assert db_session.query(RefreshToken).filter(RefreshToken.revogado.is_(False)).count() == 0
+
+
+def test_logout_revokes_refresh_token(client):
+    tokens = _create_and_login(client)
+
+    out = client.post("/auth/logout", headers=_bearer(tokens["refresh_token"]))
+    assert out.status_code == 200
+
+    res = client.post("/auth/refresh_token", headers=_bearer(tokens["refresh_token"]))
+    assert res.status_code == 401
+
+
+def test_revoke_all_invalidates_every_session(client):
+    first = _create_and_login(client)
+    second = client.post("/auth/login", json={"email": "auth@test.com", "senha": "segredo123"}).json()
+
+    res = client.post("/auth/revoke_all", headers=_bearer(first["access_token"]))
+    assert res.status_code == 200
+    assert res.json()["mensagem"].startswith("2 ")
+
+    for tokens in (first, second):
+        assert client.post("/auth/refresh_token", headers=_bearer(tokens["refresh_token"])).status_code == 401
+
+
+def _write_rsa_key(directory, kid, public_dir=None):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    (directory / f"{kid}.pem").write_bytes(pem)
+    if public_dir is not None:
+        public_pem = key.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        (public_dir / f"{kid}.pem").write_bytes(public_pem)
+
+
+def test_rs256_keyset_rotation_and_jwks(client, tmp_path, monkeypatch):
+    from utils import security
+    from utils.jwt_keys import load_keyset
+
+    signer_dir, verifier_dir = tmp_path / "signer", tmp_path / "verifier"
+    signer_dir.mkdir()
+    verifier_dir.mkdir()
+    _write_rsa_key(signer_dir, "2026-01", verifier_dir)
+    monkeypatch.setattr(security, "ALGORITHM", "RS256")
+    monkeypatch.setattr(security, "keyset", load_keyset("RS256", None, str(signer_dir), None))
+    old_token = security.create_access_token({"sub": "1"})
+
+    # Rotação: nova chave ativa, a antiga continua válida para verificação
+    _write_rsa_key(signer_dir, "2026-02", verifier_dir)
+    monkeypatch.setattr(security, "keyset", load_keyset("RS256", None, str(signer_dir), None))
+    new_token = security.create_access_token({"sub": "1"})
+
+    assert security.keyset.signing_kid == "2026-02"
+    assert security.decode_token(old_token)["sub"] == "1"
+    assert security.decode_token(new_token)["sub"] == "1"
+
+    monkeypatch.setattr("routes.auth_routes.keyset", security.keyset)
+    res = client.get("/.well-known/jwks.json")
+    assert res.status_code == 200
+    keys = res.json()["keys"]
+    assert {k["kid"] for k in keys} == {"2026-01", "2026-02"}
+    assert all("d" not in k for k in keys)
+
+    # Nó verificador: só chaves públicas, valida sem segredo compartilhado
+    verifier = load_keyset("RS256", None, str(verifier_dir), None)
+    monkeypatch.setattr(security, "keyset", verifier)
+    assert verifier.signing_kid is None
+    assert security.decode_token(new_token)["sub"] == "1"
+
+
+def test_login_rate_limit_blocks_before_bcrypt(client, monkeypatch):
+    from utils.rate_limit import login_rate_limiter, BucketRule
+
+    monkeypatch.setattr(login_rate_limiter, "per_email", BucketRule(capacity=2, refill_per_minute=1))
+    calls = []
+    monkeypatch.setattr("routes.auth_routes.user_auth", lambda *args: calls.append(args) or False)
+
+    for _ in range(2):
+        res = client.post("/auth/login", json={"email": "Alvo@test.com", "senha": "x"})
+        assert res.status_code == 401
+
+    blocked = client.post("/auth/login", json={"email": "alvo@test.com ", "senha": "x"})
+    assert blocked.status_code == 429
+    assert int(blocked.headers["Retry-After"]) >= 1
+    assert len(calls) == 2
+
+
+def test_login_rate_limit_by_ip_does_not_drain_the_email_bucket(monkeypatch):
+    from fastapi import HTTPException
+    from utils.rate_limit import login_rate_limiter, BucketRule
+
+    monkeypatch.setattr(login_rate_limiter, "per_ip", BucketRule(capacity=1, refill_per_minute=1))
+    monkeypatch.setattr(login_rate_limiter, "per_email", BucketRule(capacity=2, refill_per_minute=1))
+
+    login_rate_limiter.check("10.0.0.1", "alvo@test.com")
+    # IP esgotado: rejeitado sem tocar no bucket do email
+    for _ in range(5):
+        with pytest.raises(HTTPException) as exc:
+            login_rate_limiter.check("10.0.0.1", "alvo@test.com")
+        assert exc.value.status_code == 429
+
+    # O dono da conta, de outro IP, ainda tem a tentativa restante do bucket do email
+    login_rate_limiter.check("10.0.0.2", "alvo@test.com")
+    with pytest.raises(HTTPException):
+        login_rate_limiter.check("10.0.0.3", "alvo@test.com")
+
+
+def test_duplicate_signup_skips_hash_and_unknown_login_runs_dummy_verify(client, monkeypatch):
+    from utils.security import bcrypt_context
+
+    conta = {"nome": "dup", "email": "dup@test.com", "senha": "segredo123"}
+    assert client.post("/auth/create_account", json=conta).status_code == 201
+
+    hashes, dummies = [], []
+    monkeypatch.setattr(bcrypt_context, "hash", lambda *a, **k: hashes.append(a))
+    monkeypatch.setattr("services.auth_service.dummy_verify_password", lambda *a, **k: dummies.append(a))
+
+    dup = client.post("/auth/create_account", json=conta)
+    assert dup.status_code == 409
+    assert hashes == []
+
+    res = client.post("/auth/login", json={"email": "ninguem@test.com", "senha": "x"})
+    assert res.status_code == 401
+    assert len(dummies) == 1
+
+
+def test_login_rehashes_password_outside_current_policy(client, db_session):
+    from passlib.context import CryptContext
+    from models.usuario_model import Usuario
+    from utils.security import bcrypt_context
+
+    legado = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("segredo123")
+    db_session.add(Usuario(nome="legado", email="legado@test.com", senha=legado))
+    db_session.commit()
+
+    res = client.post("/auth/login", json={"email": "legado@test.com", "senha": "segredo123"})
+    assert res.status_code == 200
+
+    usuario = db_session.query(Usuario).filter(Usuario.email == "legado@test.com").one()
+    db_session.refresh(usuario)
+    assert usuario.senha != legado
+    assert usuario.senha.startswith("$argon2")
+    assert not bcrypt_context.needs_update(usuario.senha)
+    # Nova senha continua válida
+    assert client.post("/auth/login", json={"email": "legado@test.com", "senha": "segredo123"}).status_code == 200
+
+
+def test_unknown_email_costs_one_verify_of_the_most_expensive_scheme(db_session, monkeypatch):
+    from services.auth_service import user_auth
+    from utils import security
+    from utils.security import bcrypt_context
+
+    # Custos controlados: bcrypt (contas legadas) é o esquema mais caro da política
+    monkeypatch.setattr(security, "_dummy", None)
+    monkeypatch.setattr(security, "_dummy_costs", {})
+    monkeypatch.setattr(security, "_verify_cost", lambda dummy: 0.3 if bcrypt_context.identify(dummy) == "bcrypt" else 0.03)
+    assert security._dummy_target()[0] == "bcrypt"
+
+    verificados = []
+    verify = bcrypt_context.verify
+
+    def spy(senha, hash_, *args, **kwargs):
+        verificados.append(bcrypt_context.identify(hash_))
+        return verify(senha, hash_, *args, **kwargs)
+
+    monkeypatch.setattr(bcrypt_context, "verify", spy)
+    assert user_auth("ninguem@test.com", "x", db_session) is False
+    # Uma única verificação, no esquema mais caro: nem mais barato, nem a soma dos esquemas
+    assert verificados == ["bcrypt"]
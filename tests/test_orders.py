@@ -1,67 +1,13 @@
-import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.pool import StaticPool
-from sqlalchemy.orm import sessionmaker
 from decimal import Decimal
 
+import pytest
+
 from main import app
-from database.connection import Base
-from database.dependencies import get_session, get_current_user
+from database.dependencies import get_current_user
 from models.usuario_model import Usuario
 from models.pedido_model import StatusPedido
 
 
-@pytest.fixture()
-def engine():
-    # Banco em memória compartilhado entre conexões/threads
-    return create_engine(
-        "sqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
-
-
-@pytest.fixture()
-def SessionLocal(engine):
-    return sessionmaker(bind=engine)
-
-
-@pytest.fixture(autouse=True)
-def setup_db(engine):
-    # Recria o schema a cada teste
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
-    yield
-    Base.metadata.drop_all(bind=engine)
-
-
-@pytest.fixture()
-def db_session(SessionLocal):
-    session = SessionLocal()
-    try:
-        yield session
-    finally:
-        session.close()
-
-
-@pytest.fixture()
-def client(db_session):
-    # Override da sessão do app para usar o banco de teste
-    def override_get_session():
-        try:
-            yield db_session
-        finally:
-            pass
-
-    app.dependency_overrides[get_session] = override_get_session
-    c = TestClient(app)
-    try:
-        yield c
-    finally:
-        app.dependency_overrides.pop(get_session, None)
-
-
 def _make_user(db_session, nome="user", email="user@test.com", admin=False, ativo=True) -> Usuario:
     u = Usuario(nome=nome, email=email, senha="hash", ativo=ativo, admin=admin)
     db_session.add(u)
@@ -195,3 +141,698 @@ def test_permissions_and_status_conflicts(client, db_session):
     assert fin_conflict.status_code == 409
 
     app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_reads_use_replica_except_right_after_a_write(client, db_session, monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from database import dependencies
+    from database.connection import Base
+
+    # Réplica "atrasada": schema criado, mas sem os dados do primário
+    replica = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=replica)
+    monkeypatch.setattr(dependencies, "read_sessionmakers", [sessionmaker(bind=replica)])
+
+    user = _make_user(db_session)
+    app.dependency_overrides[get_current_user] = _override_user(user)
+
+    res = client.post("/orders", json={"preco": "10.00"}, headers=_auth_headers())
+    assert res.status_code == 200
+    assert dependencies.READ_YOUR_WRITES_COOKIE in res.cookies
+
+    # Logo após a escrita: leitura no primário enxerga o pedido
+    assert client.get("/orders/my", headers=_auth_headers()).status_code == 200
+
+    # Sem o cookie de stickiness: leitura vai para a réplica
+    client.cookies.clear()
+    assert client.get("/orders/my", headers=_auth_headers()).status_code == 404
+
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def _memory_engine():
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import StaticPool
+
+    return create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+
+def test_sharding_routes_orders_by_owner_and_fans_out_admin_listing(client, db_session, monkeypatch):
+    from database import sharding
+    from models.pedido_model import Pedido
+
+    shards = [_memory_engine(), _memory_engine()]
+    for shard in shards:
+        sharding.create_shard_schema(shard)
+    monkeypatch.setattr(sharding, "shard_dbs", shards)
+
+    # usuario_id 1 → shard 1, usuario_id 4 → shard 0 (crc32 % 2)
+    users = [_make_user(db_session, nome=f"u{i}", email=f"u{i}@test.com", admin=(i == 1)) for i in range(1, 5)]
+    admin, other = users[0], users[3]
+
+    ids = {}
+    for user, preco in [(admin, "10.00"), (other, "20.00"), (admin, "30.00")]:
+        app.dependency_overrides[get_current_user] = _override_user(user)
+        res = client.post("/orders", json={"preco": preco}, headers=_auth_headers())
+        assert res.status_code == 200
+        ids[preco] = res.json()["pedido_id"]
+
+    # Ids globais e cada pedido no shard do dono
+    assert sorted(ids.values()) == [1, 2, 3]
+    with shards[1].connect() as conn:
+        assert conn.exec_driver_sql("SELECT count(*) FROM pedidos").scalar() == 2
+    with shards[0].connect() as conn:
+        assert conn.exec_driver_sql("SELECT count(*) FROM pedidos").scalar() == 1
+    assert db_session.query(Pedido).count() == 0
+
+    # Admin acessa e altera pedido de outro usuário: shard resolvido pelo diretório
+    app.dependency_overrides[get_current_user] = _override_user(admin)
+    add = client.post(
+        f"/orders/add-item/{ids['20.00']}",
+        json={"nome_produto": "lapis", "quantidade": 2, "preco_unitario": "3.00"},
+        headers=_auth_headers(),
+    )
+    assert add.status_code == 201
+    got = client.get(f"/orders/{ids['20.00']}", headers=_auth_headers())
+    assert Decimal(got.json()["preco"]) == Decimal("6.00")
+
+    # Listagem all=true: fan-out nos shards, mesclada por id
+    res = client.get("/orders/list?all=true", headers=_auth_headers())
+    assert res.status_code == 200
+    assert [p["pedido_id"] for p in res.json()] == [1, 2, 3]
+
+    app.dependency_overrides[get_current_user] = _override_user(other)
+    mine = client.get("/orders/my", headers=_auth_headers())
+    assert [p["pedido_id"] for p in mine.json()] == [ids["20.00"]]
+
+    # Dono só entra no cache após o commit: id de transação desfeita pode ser reaproveitado
+    assert sharding._order_owner_cache == {ids["10.00"]: admin.usuario_id, ids["20.00"]: other.usuario_id, ids["30.00"]: admin.usuario_id}
+    perdido = sharding.allocate_order_id(db_session, other.usuario_id)
+    db_session.rollback()
+    assert perdido not in sharding._order_owner_cache
+
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.mark.commits
+def test_reshard_copies_orders_from_primary_to_shards(engine, db_session, monkeypatch):
+    from database import reshard
+    from models.pedido_model import Pedido
+    from models.item_pedido_model import ItensPedido
+    from models.pedido_diretorio_model import PedidoDiretorio
+
+    monkeypatch.setattr(reshard, "db", engine)
+    monkeypatch.setattr(reshard, "shard_dbs", [])
+
+    users = [_make_user(db_session, nome=f"u{i}", email=f"u{i}@test.com") for i in range(1, 5)]
+    for user in (users[0], users[3]):
+        pedido = Pedido(user.usuario_id, Decimal("5.00"))
+        pedido.itens.append(ItensPedido(nome_produto="x", quantidade=1, preco_unitario=Decimal("5.00"), subtotal=Decimal("5.00")))
+        db_session.add(pedido)
+    db_session.commit()
+
+    targets = [_memory_engine(), _memory_engine()]
+    stats = reshard.reshard(targets, batch_size=1)
+    assert stats == {"lidos": 2, "copiados": 2, "itens_renumerados": 0}
+    # Reexecução é idempotente
+    assert reshard.reshard(targets, batch_size=1)["copiados"] == 0
+
+    assert db_session.query(PedidoDiretorio).count() == 2
+    for target in targets:
+        with target.connect() as conn:
+            assert conn.exec_driver_sql("SELECT count(*) FROM itens_pedidos").scalar() == 1
+
+
+def test_write_paths_publish_order_events(client, db_session, monkeypatch):
+    from services import order_events
+
+    class RecordingBroker:
+        def __init__(self):
+            self.events = []
+
+        def publish(self, event):
+            self.events.append(event)
+
+    recorder = RecordingBroker()
+    monkeypatch.setattr(order_events, "broker", recorder)
+
+    user = _make_user(db_session)
+    app.dependency_overrides[get_current_user] = _override_user(user)
+
+    order_id = client.post("/orders", json={"preco": "0.01"}, headers=_auth_headers()).json()["pedido_id"]
+    item = client.post(
+        f"/orders/add-item/{order_id}",
+        json={"nome_produto": "lapis", "quantidade": 1, "preco_unitario": "3.00"},
+        headers=_auth_headers(),
+    ).json()
+    client.delete(f"/orders/{order_id}/items/{item['id']}", headers=_auth_headers())
+    client.post(f"/orders/{order_id}/finalize", headers=_auth_headers())
+
+    assert [(e.tipo, e.status) for e in recorder.events] == [
+        ("pedido_criado", "pendente"),
+        ("item_adicionado", "pendente"),
+        ("item_removido", "pendente"),
+        ("status_alterado", "entregue"),
+    ]
+    assert recorder.events[1].item_id == item["id"]
+
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_in_memory_broker_delivers_only_to_matching_subscribers():
+    import asyncio
+    from services.order_events import InMemoryBroker, OrderEvent
+
+    async def scenario():
+        broker = InMemoryBroker()
+        async with broker.subscribe(1) as mine, broker.subscribe(None) as everything:
+            broker.publish(OrderEvent("status_alterado", 10, 2, "entregue", "1.00"))
+            broker.publish(OrderEvent("status_alterado", 11, 1, "cancelado", "2.00"))
+            first_mine = await asyncio.wait_for(mine.get(), 1)
+            all_ids = [(await asyncio.wait_for(everything.get(), 1)).pedido_id for _ in range(2)]
+        return first_mine, all_ids
+
+    first_mine, all_ids = asyncio.run(scenario())
+    assert first_mine.pedido_id == 11
+    assert "event: status_alterado" in first_mine.to_sse()
+    assert all_ids == [10, 11]
+
+
+@pytest.mark.commits
+def test_outbox_is_written_with_the_change_and_drained_with_retries(client, db_session, engine, monkeypatch):
+    from datetime import timedelta
+    from services import outbox_worker as worker_module
+    from services.outbox_worker import OutboxWorker
+    from models.outbox_model import EventoOutbox
+
+    user = _make_user(db_session)
+    app.dependency_overrides[get_current_user] = _override_user(user)
+    order_id = client.post("/orders", json={"preco": "0.01"}, headers=_auth_headers()).json()["pedido_id"]
+    client.post(f"/orders/{order_id}/finalize", headers=_auth_headers())
+    app.dependency_overrides.pop(get_current_user, None)
+
+    assert [e.tipo for e in db_session.query(EventoOutbox).order_by(EventoOutbox.id)] == ["pedido_criado", "status_alterado"]
+
+    entregues, falhas = [], []
+
+    def flaky(payload):
+        if payload["tipo"] == "status_alterado" and not falhas:
+            falhas.append(payload)
+            raise RuntimeError("downstream fora do ar")
+        entregues.append(payload)
+
+    monkeypatch.setattr(worker_module, "_handlers", {"*": [flaky]})
+    worker = OutboxWorker(engines=lambda: [engine], batch_size=10)
+    assert worker.drain_once() == 2
+    assert [p["tipo"] for p in entregues] == ["pedido_criado"]
+
+    db_session.expire_all()
+    falhou = db_session.query(EventoOutbox).filter(EventoOutbox.tipo == "status_alterado").one()
+    assert falhou.processado_em is None and falhou.tentativas == 1 and "fora do ar" in falhou.ultimo_erro
+
+    # Retry só depois do backoff
+    assert worker.drain_once() == 0
+    falhou.proxima_tentativa_em = falhou.criado_em
+    db_session.commit()
+    assert worker.drain_once() == 1
+    assert [p["tipo"] for p in entregues] == ["pedido_criado", "status_alterado"]
+    assert db_session.query(EventoOutbox).filter(EventoOutbox.processado_em.is_(None)).count() == 0
+
+    # Retenção: processados antigos são apagados; pendentes nunca
+    pendente = EventoOutbox("pedido_criado", order_id, "{}", falhou.criado_em)
+    db_session.add(pendente)
+    db_session.commit()
+    assert worker.purge_processed() == 0
+    worker.retention = timedelta(0)
+    assert worker.purge_processed() == 2
+    assert [e.id for e in db_session.query(EventoOutbox)] == [pendente.id]
+
+
+def test_bulk_status_updates_in_one_statement_with_per_id_outcomes(client, db_session):
+    from models.outbox_model import EventoOutbox
+
+    admin = _make_user(db_session, nome="admin", email="a@test.com", admin=True)
+    user = _make_user(db_session, nome="user", email="u@test.com")
+
+    app.dependency_overrides[get_current_user] = _override_user(user)
+    ids = [client.post("/orders", json={"preco": "1.00"}, headers=_auth_headers()).json()["pedido_id"] for _ in range(3)]
+    client.post(f"/orders/{ids[2]}/finalize", headers=_auth_headers())
+
+    # Não admin → 403
+    forbidden = client.post("/orders/bulk-status", json={"status": "cancelado", "ids": ids}, headers=_auth_headers())
+    assert forbidden.status_code == 403
+
+    app.dependency_overrides[get_current_user] = _override_user(admin)
+    res = client.post("/orders/bulk-status", json={"status": "cancelado", "ids": ids + [999]}, headers=_auth_headers())
+    assert res.status_code == 200
+    body = res.json()
+    assert body["atualizados"] == 2
+    assert [r["resultado"] for r in body["resultados"]] == ["atualizado", "atualizado", "conflito", "nao_encontrado"]
+
+    listed = client.get("/orders/list?all=true", headers=_auth_headers()).json()
+    assert [p["status"] for p in listed] == ["cancelado", "cancelado", "entregue"]
+    eventos = db_session.query(EventoOutbox).filter(EventoOutbox.tipo == "status_alterado").count()
+    assert eventos == 3
+
+    # Modo filtro sem ids: nada mais a alterar
+    res = client.post("/orders/bulk-status", json={"status": "entregue", "usuario_id": user.usuario_id}, headers=_auth_headers())
+    assert res.json() == {"atualizados": 0, "resultados": []}
+
+    # Sem ids nem filtro → 422
+    assert client.post("/orders/bulk-status", json={"status": "entregue"}, headers=_auth_headers()).status_code == 422
+
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_idempotency_key_replays_response_without_reexecuting(client, db_session):
+    import json
+    from datetime import datetime
+    from fastapi import HTTPException
+    from models.pedido_model import Pedido
+    from models.item_pedido_model import ItensPedido
+    from models.idempotency_model import IdempotencyKey
+    from schemas.order_schema import OrderSchema, OrderOutSchema
+    from services.idempotency_service import idempotency_store, run_idempotent
+
+    user = _make_user(db_session)
+    app.dependency_overrides[get_current_user] = _override_user(user)
+    headers = {**_auth_headers(), "Idempotency-Key": "pedido-1"}
+
+    first = client.post("/orders", json={"preco": "10.00"}, headers=headers)
+    retry = client.post("/orders", json={"preco": "10.00"}, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert db_session.query(Pedido).count() == 1
+    order_id = first.json()["pedido_id"]
+
+    # Mesma chave com outro corpo → 422
+    assert client.post("/orders", json={"preco": "20.00"}, headers=headers).status_code == 422
+
+    item = {"nome_produto": "Pizza", "quantidade": 1, "preco_unitario": "5.00"}
+    item_headers = {**_auth_headers(), "Idempotency-Key": "item-1"}
+    added = client.post(f"/orders/add-item/{order_id}", json=item, headers=item_headers)
+    # Replay vem do banco quando o LRU não tem a chave (ex.: outro worker)
+    idempotency_store.clear()
+    again = client.post(f"/orders/add-item/{order_id}", json=item, headers=item_headers)
+    assert added.status_code == again.status_code == 201
+    assert again.json() == added.json()
+    assert db_session.query(ItensPedido).count() == 1
+
+    # Erros não são armazenados: a chave fica livre para o retry
+    missing = client.post("/orders/add-item/999", json=item, headers={**_auth_headers(), "Idempotency-Key": "item-2"})
+    assert missing.status_code == 404
+    ok = client.post(f"/orders/add-item/{order_id}", json=item, headers={**_auth_headers(), "Idempotency-Key": "item-2"})
+    assert ok.status_code == 201
+
+    # Resposta gravada na transação do handler: a linha da chave já sai concluída
+    chave = db_session.query(IdempotencyKey).filter(IdempotencyKey.chave == "item-2").one()
+    assert chave.status_code == 201 and json.loads(chave.resposta)["id"] == ok.json()["id"]
+
+    # Lease vencido e outra execução assumiu a chave: o trabalho desta é desfeito (409)
+    def takeover():
+        pedido = Pedido(user.usuario_id, Decimal("1.00"))
+        db_session.add(pedido)
+        db_session.query(IdempotencyKey).filter(IdempotencyKey.chave == "pedido-2").update(
+            {IdempotencyKey.criado_em: datetime(2100, 1, 1)}, synchronize_session=False
+        )
+        return pedido
+
+    with pytest.raises(HTTPException) as exc:
+        run_idempotent(
+            session=db_session, usuario_id=user.usuario_id, chave="pedido-2", escopo="POST /orders",
+            payload=OrderSchema(preco=Decimal("1.00")), handler=takeover, response_model=OrderOutSchema,
+        )
+    assert exc.value.status_code == 409
+    assert db_session.query(Pedido).count() == 1
+
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_catalog_prices_items_and_reports_sales_by_product_id(client, db_session):
+    from services.catalog_service import catalog
+
+    admin = _make_user(db_session, nome="admin", email="a@test.com", admin=True)
+    user = _make_user(db_session, nome="user", email="u@test.com")
+
+    app.dependency_overrides[get_current_user] = _override_user(admin)
+    created = client.post("/products", json={"nome": "Pizza", "preco": "30.00"}, headers=_auth_headers())
+    assert created.status_code == 201
+    pizza_id = created.json()["produto_id"]
+    assert client.post("/products", json={"nome": "Pizza", "preco": "1.00"}, headers=_auth_headers()).status_code == 409
+
+    app.dependency_overrides[get_current_user] = _override_user(user)
+    assert client.post("/products", json={"nome": "Refri", "preco": "5.00"}, headers=_auth_headers()).status_code == 403
+    order_id = client.post("/orders", json={"preco": "0.01"}, headers=_auth_headers()).json()["pedido_id"]
+
+    # produto_id: preço vem do catálogo, o do cliente é ignorado
+    item = client.post(
+        f"/orders/add-item/{order_id}",
+        json={"produto_id": pizza_id, "quantidade": 2, "preco_unitario": "0.01"},
+        headers=_auth_headers(),
+    ).json()
+    assert (item["produto_id"], item["nome_produto"], Decimal(item["subtotal"])) == (pizza_id, "Pizza", Decimal("60.00"))
+
+    # Fluxo legado por nome fora do catálogo: item avulso, o catálogo não muda
+    legado = client.post(
+        f"/orders/add-item/{order_id}",
+        json={"nome_produto": "Refri", "quantidade": 1, "preco_unitario": "0.50"},
+        headers=_auth_headers(),
+    ).json()
+    assert legado["produto_id"] is None and Decimal(legado["subtotal"]) == Decimal("0.50")
+    assert catalog.find_by_name(db_session, "Refri") is None
+    # Nome do catálogo pelo fluxo legado: vale o preço do catálogo
+    por_nome = client.post(
+        f"/orders/add-item/{order_id}",
+        json={"nome_produto": "Pizza", "quantidade": 1, "preco_unitario": "0.01"},
+        headers=_auth_headers(),
+    ).json()
+    assert (por_nome["produto_id"], Decimal(por_nome["subtotal"])) == (pizza_id, Decimal("30.00"))
+
+    # Admin cadastra o produto de verdade (o nome não foi tomado pelo item avulso)
+    app.dependency_overrides[get_current_user] = _override_user(admin)
+    refri = client.post("/products", json={"nome": "Refri", "preco": "5.00"}, headers=_auth_headers())
+    assert refri.status_code == 201
+    client.post(f"/orders/add-item/{order_id}", json={"nome_produto": "Refri", "quantidade": 1}, headers=_auth_headers())
+
+    # Mudança de preço atualiza o cache; itens já gravados mantêm o preço da compra
+    client.patch(f"/products/{pizza_id}", json={"preco": "35.00"}, headers=_auth_headers())
+    assert Decimal(client.get(f"/products/{pizza_id}", headers=_auth_headers()).json()["preco"]) == Decimal("35.00")
+    client.post(f"/orders/add-item/{order_id}", json={"produto_id": pizza_id, "quantidade": 1}, headers=_auth_headers())
+
+    report = client.get("/products/report", headers=_auth_headers()).json()
+    assert [(r["nome"], r["quantidade"], Decimal(r["total"]), r["pedidos"]) for r in report] == [
+        ("Pizza", 4, Decimal("125.00"), 1),
+        ("Refri", 1, Decimal("5.00"), 1),
+    ]
+
+    # Produto inativo não pode ser adicionado
+    client.patch(f"/products/{pizza_id}", json={"ativo": False}, headers=_auth_headers())
+    assert [p["nome"] for p in client.get("/products", headers=_auth_headers()).json()] == ["Refri"]
+    res = client.post(f"/orders/add-item/{order_id}", json={"produto_id": pizza_id, "quantidade": 1}, headers=_auth_headers())
+    assert res.status_code == 409
+
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_item_search_uses_fts_prefix_ranking_pagination_and_permissions(client, db_session):
+    admin = _make_user(db_session, nome="admin", email="a@test.com", admin=True)
+    user = _make_user(db_session, nome="user", email="u@test.com")
+    other = _make_user(db_session, nome="other", email="o@test.com")
+
+    def _order_with(owner, nomes):
+        app.dependency_overrides[get_current_user] = _override_user(owner)
+        order_id = client.post("/orders", json={"preco": "1.00"}, headers=_auth_headers()).json()["pedido_id"]
+        ids = []
+        for nome in nomes:
+            res = client.post(
+                f"/orders/add-item/{order_id}",
+                json={"nome_produto": nome, "quantidade": 1, "preco_unitario": "1.00"},
+                headers=_auth_headers(),
+            )
+            ids.append(res.json()["id"])
+        return order_id, ids
+
+    order_id, (calabresa, _, mussarela) = _order_with(user, ["Pizza Calabresa", "Refrigerante", "Pizza Mussarela"])
+    _order_with(other, ["Pizza de Calabresa Especial"])
+
+    app.dependency_overrides[get_current_user] = _override_user(user)
+    # Prefixo, sem acento, e só os pedidos do próprio usuário
+    res = client.get("/orders/items/search", params={"q": "piz"}, headers=_auth_headers())
+    assert res.status_code == 200
+    assert {i["id"] for i in res.json()} == {calabresa, mussarela}
+    assert [i["id"] for i in client.get("/orders/items/search", params={"q": "pizza cala"}, headers=_auth_headers()).json()] == [calabresa]
+    # Sintaxe FTS do cliente é neutralizada
+    res = client.get("/orders/items/search", params={"q": 'pizza" NOT ^cala*'}, headers=_auth_headers())
+    assert res.status_code == 404  # "NOT" vira palavra comum, não operador
+    assert client.get("/orders/items/search", params={"q": "pizza", "all": True}, headers=_auth_headers()).status_code == 403
+
+    # Admin: todos os pedidos, ranqueados e paginados
+    app.dependency_overrides[get_current_user] = _override_user(admin)
+    todos = client.get("/orders/items/search", params={"q": "calabresa", "all": True}, headers=_auth_headers()).json()
+    assert len(todos) == 2 and todos[0]["id"] == calabresa  # nome mais curto = mais relevante
+    pagina = client.get("/orders/items/search", params={"q": "calabresa", "all": True, "limit": 1, "offset": 1}, headers=_auth_headers()).json()
+    assert [i["id"] for i in pagina] == [todos[1]["id"]]
+
+    # Triggers mantêm o índice: item removido some da busca
+    app.dependency_overrides[get_current_user] = _override_user(user)
+    client.delete(f"/orders/{order_id}/items/{mussarela}", headers=_auth_headers())
+    res = client.get("/orders/items/search", params={"q": "mussarela"}, headers=_auth_headers())
+    assert res.status_code == 404
+
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.mark.commits
+def test_archival_moves_old_terminal_orders_and_reads_fall_back(client, db_session, engine):
+    from datetime import timedelta
+    from database.archive import archive_orders
+    from models.pedido_model import Pedido
+    from models.item_pedido_model import ItensPedido
+    from models.pedido_arquivo_model import PedidoArquivo
+    from utils.clock import utcnow
+
+    user = _make_user(db_session)
+    app.dependency_overrides[get_current_user] = _override_user(user)
+
+    ids = [client.post("/orders", json={"preco": "1.00"}, headers=_auth_headers()).json()["pedido_id"] for _ in range(3)]
+    for order_id in ids:
+        client.post(
+            f"/orders/add-item/{order_id}",
+            json={"nome_produto": "Pizza", "quantidade": 2, "preco_unitario": "10.00"},
+            headers=_auth_headers(),
+        )
+    client.post(f"/orders/{ids[0]}/finalize", headers=_auth_headers())
+    client.delete(f"/orders/{ids[1]}", headers=_auth_headers())
+    before = client.get(f"/orders/{ids[0]}/items", headers=_auth_headers()).json()
+
+    # Recém-finalizados ainda não passaram do limite
+    assert archive_orders(timedelta(days=30), engines=[engine]) == 0
+    db_session.query(Pedido).update({Pedido.atualizado_em: utcnow() - timedelta(days=31)}, synchronize_session=False)
+    db_session.commit()
+    # Lote de 1: exercita o loop de lotes; o pedido PENDENTE fica
+    assert archive_orders(timedelta(days=30), batch_size=1, engines=[engine]) == 2
+
+    db_session.expire_all()
+    assert [p.pedido_id for p in db_session.query(Pedido).all()] == [ids[2]]
+    assert db_session.query(ItensPedido).count() == 1
+    assert db_session.query(PedidoArquivo).count() == 2
+
+    # Leituras por id continuam funcionando a partir do arquivo
+    res = client.get(f"/orders/{ids[0]}", headers=_auth_headers())
+    assert res.status_code == 200
+    assert (res.json()["status"], Decimal(res.json()["preco"])) == ("entregue", Decimal("20.00"))
+    assert client.get(f"/orders/{ids[0]}/items", headers=_auth_headers()).json() == before
+    assert client.get(f"/orders/{ids[1]}", headers=_auth_headers()).json()["status"] == "cancelado"
+    assert client.get("/orders/999", headers=_auth_headers()).status_code == 404
+
+    # Listagens: só pedidos ativos, a menos que arquivados=true
+    assert [p["pedido_id"] for p in client.get("/orders/my", headers=_auth_headers()).json()] == [ids[2]]
+    completos = client.get("/orders/my", params={"arquivados": True}, headers=_auth_headers()).json()
+    assert [p["pedido_id"] for p in completos] == ids
+    listados = client.get("/orders/list", params={"arquivados": True}, headers=_auth_headers()).json()
+    assert listados == completos
+    user.admin = True
+    todos = client.get("/orders/list", params={"all": True, "arquivados": True}, headers=_auth_headers()).json()
+    assert [p["pedido_id"] for p in todos] == ids
+    assert [p["pedido_id"] for p in client.get("/orders/list?all=true", headers=_auth_headers()).json()] == [ids[2]]
+
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_concurrent_identical_reads_share_one_fetch(client, db_session, monkeypatch):
+    import asyncio
+    import time
+    import httpx
+    from routes import order_routes
+
+    admin = _make_user(db_session, nome="admin", email="a@test.com", admin=True)
+    app.dependency_overrides[get_current_user] = _override_user(admin)
+    order_id = client.post("/orders", json={"preco": "12.34"}, headers=_auth_headers()).json()["pedido_id"]
+
+    # Busca lenta para garantir sobreposição das requisições
+    chamadas = []
+    load_order_json = order_routes._load_order_json
+
+    def slow_load(engine, oid):
+        chamadas.append(oid)
+        time.sleep(0.2)
+        return load_order_json(engine, oid)
+
+    monkeypatch.setattr(order_routes, "_load_order_json", slow_load)
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            return await asyncio.gather(*(ac.get(f"/orders/{order_id}", headers=_auth_headers()) for _ in range(5)))
+
+    respostas = asyncio.run(burst())
+    assert [r.status_code for r in respostas] == [200] * 5
+    assert all(r.json() == respostas[0].json() for r in respostas)
+    assert Decimal(respostas[0].json()["preco"]) == Decimal("12.34")
+    assert chamadas == [order_id]
+
+    stats = client.get("/orders/single-flight/stats", headers=_auth_headers()).json()
+    assert stats["order_by_id"] == {"executados": 1, "agrupados": 4, "em_andamento": 0}
+
+    # Sem concorrência, cada leitura executa a própria busca (nada é cacheado)
+    assert client.get(f"/orders/{order_id}", headers=_auth_headers()).status_code == 200
+    assert len(chamadas) == 2
+    assert client.get("/orders/999", headers=_auth_headers()).status_code == 404
+
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_load_shedding_rejects_when_queue_is_full_and_enforces_deadlines():
+    import asyncio
+    import time
+    import httpx
+    from fastapi import FastAPI
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.exc import OperationalError
+    from database.pool import install_deadline_interrupt
+    from utils.load_shedding import LoadSheddingMiddleware, RouteGroup, request_deadline, run_in_group_threadpool
+
+    mini = FastAPI()
+
+    @mini.get("/orders/slow")
+    async def slow():
+        await asyncio.sleep(0.2)
+        return {"ok": True}
+
+    @mini.get("/orders/stuck")
+    async def stuck():
+        await asyncio.sleep(5)
+
+    @mini.get("/auth/ping")
+    async def ping():
+        return {"ok": True}
+
+    @mini.get("/auth/hash")
+    async def hash_():
+        # Hash de senha em thread: o cancelamento pelo deadline não para a thread
+        await run_in_group_threadpool(time.sleep, 0.6)
+        return {"ok": True}
+
+    shedding = LoadSheddingMiddleware(
+        mini,
+        groups=[
+            RouteGroup("auth", ("/auth",), max_concurrency=1, max_queue=0, timeout=1),
+            RouteGroup("orders", ("/orders",), max_concurrency=1, max_queue=1, timeout=0.5),
+        ],
+    )
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=shedding)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            # 1 executando + 1 na fila; o terceiro é rejeitado sem esperar
+            burst = await asyncio.gather(*(ac.get("/orders/slow") for _ in range(3)))
+            # Grupo auth tem vagas próprias: não é afetado pela fila de pedidos
+            auth_during_orders, expired = await asyncio.gather(ac.get("/auth/ping"), ac.get("/orders/stuck"))
+            return burst, auth_during_orders, expired
+
+    burst, auth_during_orders, expired = asyncio.run(scenario())
+    assert sorted(r.status_code for r in burst) == [200, 200, 503]
+    rejected = next(r for r in burst if r.status_code == 503)
+    assert rejected.headers["Retry-After"] == "1"
+    assert auth_during_orders.status_code == 200
+    assert expired.status_code == 504
+    assert shedding.stats()["orders"] == {"em_execucao": 0, "na_fila": 0, "rejeitados": 1, "expirados": 1}
+
+    # Prazo por rota dentro do grupo: prefixo mais longo vence, o resto usa o do grupo
+    orders = RouteGroup("orders", ("/orders",), 1, 1, timeout=0.5, timeouts=(("/orders/list", 30), ("/orders/list/all", 60)))
+    assert orders.timeout_for("/orders/list") == 30
+    assert orders.timeout_for("/orders/list/all") == 60
+    assert orders.timeout_for("/orders/7") == orders.timeout_for("/orders/listing") == 0.5
+
+    hashing = LoadSheddingMiddleware(mini, groups=[RouteGroup("auth", ("/auth",), max_concurrency=1, max_queue=0, timeout=0.2)])
+
+    async def threadpool_scenario():
+        transport = httpx.ASGITransport(app=hashing)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            expired = await ac.get("/auth/hash")
+            # Deadline estourou, mas a thread ainda roda: a vaga continua ocupada
+            busy = await ac.get("/auth/ping")
+            running = hashing.stats()["auth"]["em_execucao"]
+            await asyncio.sleep(0.6)
+            return expired, busy, running, await ac.get("/auth/ping")
+
+    expired, busy, running, after = asyncio.run(threadpool_scenario())
+    assert (expired.status_code, busy.status_code, running, after.status_code) == (504, 503, 1, 200)
+    assert hashing.stats()["auth"]["em_execucao"] == 0
+
+    # Query no banco passando do deadline é interrompida pelo próprio SQLite
+    engine = create_engine("sqlite:///:memory:")
+    install_deadline_interrupt(engine)
+    heavy = text("WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) SELECT count(*) FROM n")
+    token = request_deadline.set(0.0)
+    try:
+        with engine.connect() as conn, pytest.raises(OperationalError, match="interrupted"):
+            conn.execute(heavy)
+    finally:
+        request_deadline.reset(token)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+
+
+def test_bulk_seeded_catalog_report_and_listing(client, db_session, seed):
+    admin = _make_user(db_session, nome="admin", email="a@test.com", admin=True)
+    usuarios = seed.users(200)
+    produtos = seed.products(4, preco=Decimal("2.50"))
+    pedidos = seed.orders(usuarios, por_usuario=5)
+    itens = seed.items(pedidos, por_pedido=4, produtos_ids=produtos, quantidade=2)
+    assert (len(usuarios), len(pedidos), len(itens)) == (200, 1000, 4000)
+
+    app.dependency_overrides[get_current_user] = _override_user(admin)
+    report = client.get("/products/report", headers=_auth_headers()).json()
+    # Rodízio de 4 produtos em 4 itens por pedido: cada produto em todos os pedidos
+    assert [r["produto_id"] for r in report] == produtos
+    assert all(r["quantidade"] == 2000 and r["pedidos"] == 1000 for r in report)
+    assert {Decimal(r["total"]) for r in report} == {Decimal("5000.00")}
+
+    # Total de cada pedido recalculado a partir dos itens
+    dono = db_session.get(Usuario, usuarios[0])
+    app.dependency_overrides[get_current_user] = _override_user(dono)
+    meus = client.get("/orders/my", headers=_auth_headers()).json()
+    assert len(meus) == 5
+    assert {Decimal(p["preco"]) for p in meus} == {Decimal("20.00")}
+
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_money_is_stored_as_integer_cents_and_validated(client, db_session):
+    from sqlalchemy import text
+    from services.order_service import _recalc_order_total
+    from utils.money import from_cents, to_cents
+
+    # Arredondamento: meio centavo para cima; float passa por str (sem lixo binário)
+    assert [to_cents(v) for v in (Decimal("10.005"), Decimal("10.004"), "0.1", 0.1 + 0.2, 3)] == [1001, 1000, 10, 30, 300]
+    assert from_cents(1999) == Decimal("19.99") and from_cents(0) == Decimal("0.00")
+    assert all(from_cents(to_cents(v)) == Decimal(v) for v in ("0.01", "19.99", "123456789.10"))
+
+    user = _make_user(db_session)
+    app.dependency_overrides[get_current_user] = _override_user(user)
+
+    # Mais de 2 casas decimais → 422 (pedido e item)
+    assert client.post("/orders", json={"preco": "10.001"}, headers=_auth_headers()).status_code == 422
+    order_id = client.post("/orders", json={"preco": "0.10"}, headers=_auth_headers()).json()["pedido_id"]
+    item = {"nome_produto": "bala", "quantidade": 3, "preco_unitario": "0.105"}
+    assert client.post(f"/orders/add-item/{order_id}", json=item, headers=_auth_headers()).status_code == 422
+
+    # 0.1 três vezes: em REAL daria 0.30000000000000004
+    item["preco_unitario"] = "0.10"
+    for _ in range(3):
+        assert client.post(f"/orders/add-item/{order_id}", json=item, headers=_auth_headers()).status_code == 201
+
+    # No banco: INTEGER em centavos
+    preco = db_session.execute(text("SELECT preco, typeof(preco) FROM pedidos WHERE id = :id"), {"id": order_id}).one()
+    assert tuple(preco) == (90, "integer")
+    subtotais = db_session.execute(text("SELECT DISTINCT subtotal, typeof(subtotal) FROM itens_pedidos")).all()
+    assert [tuple(r) for r in subtotais] == [(30, "integer")]
+
+    total = _recalc_order_total(db_session, order_id)
+    assert isinstance(total, Decimal) and total == Decimal("0.90") and str(total) == "0.90"
+
+    app.dependency_overrides.pop(get_current_user, None)
@@ -0,0 +1,30 @@
+def test_startup_warmup_primes_pools_and_password_context(engine, monkeypatch):
+    from database import pool
+    from utils import security
+    from utils.security import bcrypt_context, warm_password_context
+
+    monkeypatch.setattr(pool, "all_engines", lambda: [engine])
+    # StaticPool não tem size(): aquece uma conexão
+    assert pool.warm_all_pools() == 1
+    # Hash fictício pronto: o primeiro login com email inexistente não paga esse custo
+    monkeypatch.setattr(security, "_dummy", None)
+    monkeypatch.setattr(security, "_dummy_costs", {})
+    warm_password_context()
+    assert security._dummy is not None
+    assert set(security._dummy_costs) == set(bcrypt_context.schemes())
+
+
+def test_server_restart_policy_backs_off_and_halts_on_startup_failure():
+    from uvicorn.config import STARTUP_FAILURE
+    from server import RestartPolicy
+
+    policy = RestartPolicy(min_uptime=5, max_fast_failures=3)
+    # Startup falhou (ex.: banco sem migrações): reiniciar só repetiria o erro
+    assert policy.on_exit(STARTUP_FAILURE, uptime=0.2) is None
+    # Quedas rápidas: backoff crescente e, após o limite, desiste
+    assert [policy.on_exit(1, uptime=0.5) for _ in range(3)] == [0.5, 1.0, None]
+    # Worker que ficou de pé reinicia na hora e zera a contagem
+    policy = RestartPolicy(min_uptime=5, max_fast_failures=3)
+    policy.on_exit(1, uptime=0.5)
+    assert policy.on_exit(-9, uptime=60) == 0.0
+    assert policy.fast_failures == 0
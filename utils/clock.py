@@ -0,0 +1,6 @@
+from datetime import datetime, timezone
+
+
+def utcnow() -> datetime:
+    """Agora em UTC, sem tzinfo: SQLite não guarda offset, então persistimos sempre UTC "naive"."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
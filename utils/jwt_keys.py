@@ -0,0 +1,85 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+from jose import jwk, JWTError
+from jose.backends.base import Key
+
+
+# Algoritmos assimétricos suportados pelo python-jose (EdDSA não é suportado pela lib)
+ASYMMETRIC_ALGORITHMS = {"RS256", "RS384", "RS512", "ES256", "ES384", "ES512"}
+
+
+@dataclass
+class KeySet:
+    """
+    Conjunto de chaves JWT indexado por `kid`, com as chaves já parseadas.
+    - `signing_kid`: chave usada para assinar novos tokens (precisa ser privada)
+    - Demais chaves servem apenas para verificação (rotação sem downtime)
+    - Em HS*, existe uma única chave simétrica sem `kid`
+    """
+
+    algorithm: str
+    keys: dict[Optional[str], Key] = field(default_factory=dict)
+    signing_kid: Optional[str] = None
+
+    @property
+    def asymmetric(self) -> bool:
+        return self.algorithm in ASYMMETRIC_ALGORITHMS
+
+    def __post_init__(self):
+        # Parte pública pré-computada: verificação nunca usa a chave privada
+        self._verification_keys = {
+            kid: key.public_key() if self.asymmetric and not key.is_public() else key
+            for kid, key in self.keys.items()
+        }
+
+    def signing_key(self) -> tuple[Optional[str], Key]:
+        key = self.keys.get(self.signing_kid)
+        if key is None or (self.asymmetric and key.is_public()):
+            raise RuntimeError(f"Chave privada de assinatura não disponível (kid={self.signing_kid}).")
+        return self.signing_kid, key
+
+    def verification_key(self, kid: Optional[str]) -> Key:
+        if kid is None and self.asymmetric:
+            kid = self.signing_kid
+        key = self._verification_keys.get(kid)
+        if key is None:
+            raise JWTError(f"kid desconhecido: {kid}")
+        return key
+
+    def jwks(self) -> dict:
+        """Chaves públicas no formato JWKS (RFC 7517)."""
+        if not self.asymmetric:
+            return {"keys": []}
+        return {
+            "keys": [
+                {**key.to_dict(), "kid": kid, "use": "sig"}
+                for kid, key in self._verification_keys.items()
+            ]
+        }
+
+
+def load_keyset(algorithm: str, secret_key: Optional[str], keys_dir: Optional[str], active_kid: Optional[str]) -> KeySet:
+    """
+    Carrega e parseia as chaves uma única vez.
+    - HS*: usa SECRET_KEY
+    - RS*/ES*: lê `<kid>.pem` de `keys_dir` (privadas nos nós emissores, públicas nos verificadores)
+    """
+    if algorithm not in ASYMMETRIC_ALGORITHMS:
+        return KeySet(algorithm=algorithm, keys={None: jwk.construct(secret_key, algorithm)})
+
+    if not keys_dir:
+        raise RuntimeError(f"JWT_KEYS_DIR é obrigatório para o algoritmo {algorithm}.")
+    keys: dict[Optional[str], Key] = {}
+    for path in sorted(Path(keys_dir).glob("*.pem")):
+        keys[path.stem] = jwk.construct(path.read_text(), algorithm)
+    if not keys:
+        raise RuntimeError(f"Nenhuma chave .pem encontrada em {keys_dir}.")
+
+    if active_kid is None:
+        # Padrão: a chave privada mais recente pela ordem do nome (ex.: 2026-01.pem)
+        privadas = [kid for kid, key in keys.items() if not key.is_public()]
+        active_kid = privadas[-1] if privadas else None
+    elif active_kid not in keys:
+        raise RuntimeError(f"JWT_ACTIVE_KID={active_kid} não encontrado em {keys_dir}.")
+    return KeySet(algorithm=algorithm, keys=keys, signing_kid=active_kid)
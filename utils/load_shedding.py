@@ -0,0 +1,252 @@
+import asyncio
+import json
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+from fastapi.concurrency import run_in_threadpool
+
+# Deadline (time.monotonic) do request corrente; lido pelo banco para abortar queries
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def deadline_exceeded() -> bool:
+    deadline = request_deadline.get()
+    return deadline is not None and time.monotonic() > deadline
+
+
+@dataclass(frozen=True)
+class RouteGroup:
+    """
+    Orçamento de um grupo de rotas (por prefixo de path), por processo:
+    - `max_concurrency` requests executando ao mesmo tempo
+    - `max_queue` requests aguardando vaga; fila cheia = 503 imediato
+    - `timeout` segundos do request inteiro (fila + execução)
+    - `timeouts` prazos próprios por prefixo dentro do grupo (ex.: relatórios e
+      listagens completas); o prefixo mais longo vence, o resto usa `timeout`
+    """
+
+    name: str
+    prefixes: tuple[str, ...]
+    max_concurrency: int
+    max_queue: int
+    timeout: float
+    exclude: tuple[str, ...] = ()
+    timeouts: tuple[tuple[str, float], ...] = ()
+
+    @staticmethod
+    def _under(path: str, prefix: str) -> bool:
+        return path == prefix or path.startswith(prefix.rstrip("/") + "/")
+
+    def matches(self, path: str) -> bool:
+        if any(path.startswith(p) for p in self.exclude):
+            return False
+        return any(self._under(path, p) for p in self.prefixes)
+
+    def timeout_for(self, path: str) -> float:
+        rotas = [(prefix, timeout) for prefix, timeout in self.timeouts if self._under(path, prefix)]
+        if not rotas:
+            return self.timeout
+        return max(rotas, key=lambda rota: len(rota[0]))[1]
+
+
+class _GroupState:
+    def __init__(self, group: RouteGroup):
+        self.group = group
+        self.semaphore = asyncio.Semaphore(group.max_concurrency)
+        self.em_execucao = 0
+        self.na_fila = 0
+        self.rejeitados = 0
+        self.expirados = 0
+
+    async def acquire(self, deadline: float) -> bool:
+        if self.semaphore.locked():
+            if self.na_fila >= self.group.max_queue:
+                return False
+            self.na_fila += 1
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), timeout=max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.na_fila -= 1
+        else:
+            await self.semaphore.acquire()
+        self.em_execucao += 1
+        return True
+
+    def release(self) -> None:
+        self.em_execucao -= 1
+        self.semaphore.release()
+
+
+class _Slot:
+    """
+    Vaga de um request no grupo. Cancelar a task não para uma thread: a vaga só
+    volta ao grupo quando o handler e o trabalho em thread dele (hash de senha...)
+    terminaram de fato.
+    """
+
+    def __init__(self, state: _GroupState):
+        self.state = state
+        self.pendentes = 0
+        self.handler_terminou = False
+
+    def work_started(self) -> None:
+        self.pendentes += 1
+
+    def work_done(self) -> None:
+        self.pendentes -= 1
+        self._maybe_release()
+
+    def handler_finished(self) -> None:
+        self.handler_terminou = True
+        self._maybe_release()
+
+    def _maybe_release(self) -> None:
+        if self.handler_terminou and self.pendentes == 0:
+            self.state.release()
+
+
+_current_slot: ContextVar[Optional[_Slot]] = ContextVar("load_shedding_slot", default=None)
+
+
+async def run_in_group_threadpool(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    run_in_threadpool que mantém a vaga do grupo ocupada até a thread terminar,
+    mesmo que o request estoure o deadline antes. Use para trabalho de CPU que o
+    deadline não interrompe (ex.: bcrypt/argon2); fora do middleware, é só run_in_threadpool.
+    """
+    slot = _current_slot.get()
+    if slot is None:
+        return await run_in_threadpool(fn, *args, **kwargs)
+
+    slot.work_started()
+    trabalho = asyncio.ensure_future(run_in_threadpool(fn, *args, **kwargs))
+
+    def _done(future: asyncio.Future) -> None:
+        # Consome a exceção de um trabalho cujo request já foi cancelado
+        if not future.cancelled():
+            future.exception()
+        slot.work_done()
+
+    trabalho.add_done_callback(_done)
+    # shield: o cancelamento do handler não cancela (nem "abandona") a thread
+    return await asyncio.shield(trabalho)
+
+
+async def _send_error(send, status_code: int, detail: str, headers: Optional[dict] = None) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    raw_headers += [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    await send({"type": "http.response.start", "status": status_code, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+class LoadSheddingMiddleware:
+    """
+    Middleware ASGI de deadline + limite de concorrência por grupo de rotas.
+    - Fila do grupo cheia, ou sem vaga até o deadline: 503 com Retry-After
+    - Deadline estourado durante a execução: o handler é cancelado e a resposta é 504
+      (se ela ainda não começou a ser enviada)
+    - O deadline fica em `request_deadline`: o banco aborta queries após ele
+      (ver database.pool.install_deadline_interrupt), inclusive no threadpool
+    - Trabalho de CPU em thread (run_in_group_threadpool) segura a vaga até terminar:
+      requests cancelados não deixam mais hashes rodando do que o limite do grupo
+    Rotas fora dos grupos (ou em `exclude`, como streams SSE) passam direto.
+    """
+
+    def __init__(self, app, groups: list[RouteGroup]):
+        self.app = app
+        self._groups = [_GroupState(group) for group in groups]
+
+    def _state_for(self, path: str) -> Optional[_GroupState]:
+        for state in self._groups:
+            if state.group.matches(path):
+                return state
+        return None
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            state.group.name: {
+                "em_execucao": state.em_execucao,
+                "na_fila": state.na_fila,
+                "rejeitados": state.rejeitados,
+                "expirados": state.expirados,
+            }
+            for state in self._groups
+        }
+
+    async def __call__(self, scope, receive, send):
+        state = self._state_for(scope["path"]) if scope["type"] == "http" else None
+        if state is None:
+            await self.app(scope, receive, send)
+            return
+
+        deadline = time.monotonic() + state.group.timeout_for(scope["path"])
+        if not await state.acquire(deadline):
+            state.rejeitados += 1
+            await _send_error(send, 503, "Servidor sobrecarregado. Tente novamente em instantes.", {"Retry-After": "1"})
+            return
+
+        response_started = False
+        replaced = False
+
+        async def send_wrapper(message):
+            nonlocal response_started, replaced
+            if replaced:
+                return
+            if message["type"] == "http.response.start":
+                # Query abortada pelo deadline vira 5xx no handler: responde como deadline
+                if message["status"] >= 500 and time.monotonic() > deadline:
+                    replaced = True
+                    state.expirados += 1
+                    response_started = True
+                    await _send_error(send, 504, "Tempo limite da requisição excedido")
+                    return
+                response_started = True
+            await send(message)
+
+        slot = _Slot(state)
+        token = request_deadline.set(deadline)
+        slot_token = _current_slot.set(slot)
+        try:
+            await asyncio.wait_for(self.app(scope, receive, send_wrapper), timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            if not replaced:
+                state.expirados += 1
+            if not response_started:
+                await _send_error(send, 504, "Tempo limite da requisição excedido")
+        finally:
+            _current_slot.reset(slot_token)
+            request_deadline.reset(token)
+            # Com trabalho em thread ainda rodando, a vaga é liberada quando ele acabar
+            slot.handler_finished()
+
+
+def default_route_groups() -> list[RouteGroup]:
+    return [
+        RouteGroup(
+            name="auth",
+            prefixes=("/auth",),
+            max_concurrency=int(os.getenv("AUTH_MAX_CONCURRENCY", "8")),
+            max_queue=int(os.getenv("AUTH_MAX_QUEUE", "32")),
+            timeout=float(os.getenv("AUTH_TIMEOUT_SECONDS", "5")),
+        ),
+        RouteGroup(
+            name="orders",
+            prefixes=("/orders", "/products"),
+            max_concurrency=int(os.getenv("ORDERS_MAX_CONCURRENCY", "64")),
+            max_queue=int(os.getenv("ORDERS_MAX_QUEUE", "256")),
+            timeout=float(os.getenv("ORDERS_TIMEOUT_SECONDS", "10")),
+            # Stream SSE é longo por natureza: sem deadline nem vaga no grupo
+            exclude=("/orders/events",),
+            # Varreduras (listagem de todos os pedidos, relatório de vendas) têm prazo maior
+            # que a leitura de um pedido/produto por id, que fica no prazo do grupo
+            timeouts=(
+                ("/orders/list", float(os.getenv("ORDERS_SLOW_TIMEOUT_SECONDS", "30"))),
+                ("/products/report", float(os.getenv("ORDERS_SLOW_TIMEOUT_SECONDS", "30"))),
+            ),
+        ),
+    ]
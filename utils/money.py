@@ -0,0 +1,48 @@
+"""
+Dinheiro: centavos inteiros no banco, Decimal com 2 casas no Python/JSON.
+
+- `Cents`: tipo de coluna SQLAlchemy (INTEGER). SUM/agregações rodam em inteiros
+  no banco, sem drift de REAL; a conversão para Decimal é uma por valor lido.
+- `Money` / `PositiveMoney`: tipos Pydantic dos schemas (rejeitam mais de 2 casas).
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Annotated, Any, Optional
+from pydantic import AfterValidator, Field
+from sqlalchemy import Integer
+from sqlalchemy.types import TypeDecorator
+
+CENT = Decimal("0.01")
+
+
+def to_cents(value: Any) -> int:
+    """Valor monetário (Decimal, int, str ou float) em centavos, arredondando meio centavo para cima."""
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return int(value.quantize(CENT, rounding=ROUND_HALF_UP).scaleb(2))
+
+
+def from_cents(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+class Cents(TypeDecorator):
+    """Coluna monetária armazenada em centavos (INTEGER)."""
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[int]:
+        return None if value is None else to_cents(value)
+
+    def process_result_value(self, value: Optional[int], dialect) -> Optional[Decimal]:
+        return None if value is None else from_cents(value)
+
+
+def _two_places(value: Decimal) -> Decimal:
+    if value != value.quantize(CENT):
+        raise ValueError("Valor monetário deve ter no máximo 2 casas decimais")
+    return value.quantize(CENT)
+
+
+Money = Annotated[Decimal, AfterValidator(_two_places)]
+PositiveMoney = Annotated[Money, Field(gt=0)]
@@ -0,0 +1,103 @@
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional, Protocol
+from fastapi import HTTPException
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@dataclass(frozen=True)
+class BucketRule:
+    """Token bucket: `capacity` tentativas em rajada, repostas a `refill_per_minute`."""
+
+    capacity: int
+    refill_per_minute: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.refill_per_minute / 60
+
+
+class RateLimitBackend(Protocol):
+    """
+    Armazena os buckets. A implementação em memória vale por processo;
+    para vários workers/instâncias, implemente `take` sobre um store compartilhado
+    (ex.: Redis com script Lua) com a mesma semântica.
+    """
+
+    def take(self, key: str, rule: BucketRule) -> float:
+        """Consome um token. Retorna 0 se permitido, ou os segundos até o próximo token."""
+        ...
+
+    def clear(self) -> None:
+        ...
+
+
+class InMemoryRateLimitBackend:
+    def __init__(self, max_keys: int = 100_000):
+        # LRU limitado: chaves antigas (buckets já cheios) são descartadas primeiro
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._max_keys = max_keys
+        self._lock = Lock()
+
+    def take(self, key: str, rule: BucketRule) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (float(rule.capacity), now))
+            tokens = min(rule.capacity, tokens + (now - updated_at) * rule.refill_per_second)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                retry_after = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                retry_after = (1 - tokens) / rule.refill_per_second
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class LoginRateLimiter:
+    """
+    Limita tentativas de login por IP e por email antes de qualquer query/bcrypt.
+    Excedido o limite, responde 429 com Retry-After.
+    """
+
+    def __init__(self, per_ip: BucketRule, per_email: BucketRule, backend: Optional[RateLimitBackend] = None):
+        self.per_ip = per_ip
+        self.per_email = per_email
+        self.backend = backend or InMemoryRateLimitBackend()
+
+    def check(self, ip: Optional[str], email: str) -> None:
+        # IP primeiro: cliente já bloqueado não consome o bucket do email alvo
+        # (senão um único abusador manteria a conta de outra pessoa bloqueada)
+        retry_after = self.backend.take(f"login:ip:{ip or 'desconhecido'}", self.per_ip)
+        if retry_after == 0:
+            retry_after = self.backend.take(f"login:email:{email.strip().lower()}", self.per_email)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Muitas tentativas de login. Tente novamente mais tarde.",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+login_rate_limiter = LoginRateLimiter(
+    per_ip=BucketRule(
+        capacity=int(os.getenv("LOGIN_RATE_IP_CAPACITY", "20")),
+        refill_per_minute=float(os.getenv("LOGIN_RATE_IP_PER_MINUTE", "10")),
+    ),
+    per_email=BucketRule(
+        capacity=int(os.getenv("LOGIN_RATE_EMAIL_CAPACITY", "5")),
+        refill_per_minute=float(os.getenv("LOGIN_RATE_EMAIL_PER_MINUTE", "2")),
+    ),
+)
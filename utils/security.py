@@ -1,18 +1,104 @@
 from passlib.context import CryptContext
+from passlib.hash import argon2
 from dotenv import load_dotenv
 import os
+import time
+from typing import Optional
 from datetime import datetime, timedelta, timezone
 from jose import jwt
+from utils.jwt_keys import load_keyset
+from uuid import uuid4
 
 load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 # Expiração do refresh token: padrão 7 dias
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Chaves JWT carregadas e parseadas uma única vez no import.
+# RS*/ES*: JWT_KEYS_DIR com arquivos <kid>.pem; JWT_ACTIVE_KID escolhe a chave de assinatura.
+keyset = load_keyset(ALGORITHM, SECRET_KEY, os.getenv("JWT_KEYS_DIR"), os.getenv("JWT_ACTIVE_KID"))
+
+def _build_password_context() -> CryptContext:
+    """
+    Política de hash de senha configurável por ambiente.
+    - O primeiro esquema de PASSWORD_SCHEMES é o padrão; os demais ficam deprecated
+    - Hashes fora da política (esquema ou custo) são refeitos no login (needs_update)
+    - argon2 depende do argon2-cffi; sem o backend, cai para os esquemas restantes
+    """
+    schemes = [s.strip() for s in os.getenv("PASSWORD_SCHEMES", "argon2,bcrypt").split(",") if s.strip()]
+    if "argon2" in schemes and not argon2.has_backend():
+        schemes.remove("argon2")
+    settings = {
+        "bcrypt__rounds": int(os.getenv("BCRYPT_ROUNDS", "12")),
+        # Padrões de custo do argon2id recomendados pela OWASP (19 MiB, t=2, p=1)
+        "argon2__memory_cost": int(os.getenv("ARGON2_MEMORY_COST", "19456")),
+        "argon2__time_cost": int(os.getenv("ARGON2_TIME_COST", "2")),
+        "argon2__parallelism": int(os.getenv("ARGON2_PARALLELISM", "1")),
+    }
+    settings = {k: v for k, v in settings.items() if k.split("__")[0] in schemes}
+    return CryptContext(schemes=schemes, deprecated="auto", **settings)
+
+# Nome mantido por compatibilidade: o contexto pode usar argon2 como esquema padrão
+bcrypt_context = _build_password_context()
+
+# Hash fictício do esquema mais caro da política (esquema, hash), escolhido no
+# primeiro uso (ou no warm-up); custo medido de cada esquema fica em _dummy_costs
+_dummy: Optional[tuple[str, str]] = None
+_dummy_costs: dict[str, float] = {}
+
+def _verify_cost(dummy: str) -> float:
+    # Menor de duas medições: descarta ruído (GC, troca de contexto)
+    custos = []
+    for _ in range(2):
+        inicio = time.perf_counter()
+        bcrypt_context.verify("senha-errada", dummy)
+        custos.append(time.perf_counter() - inicio)
+    return min(custos)
+
+def _dummy_target() -> tuple[str, str]:
+    global _dummy
+    if _dummy is None:
+        hashes = {}
+        for scheme in bcrypt_context.schemes():
+            hashes[scheme] = bcrypt_context.copy(default=scheme).hash("senha-ficticia")
+            _dummy_costs[scheme] = _verify_cost(hashes[scheme])
+        mais_caro = max(_dummy_costs, key=_dummy_costs.get)
+        _dummy = (mais_caro, hashes[mais_caro])
+    return _dummy
+
+def dummy_verify_password(senha: str = "") -> None:
+    """
+    Login com email inexistente: uma verificação contra o hash fictício do esquema
+    mais caro aceito pela política (custo medido com a configuração atual). Com
+    contas bcrypt legadas e argon2 como padrão, esse caminho custa o mesmo que senha
+    errada na conta mais cara, e não a soma dos esquemas (que também o denunciaria).
+    """
+    bcrypt_context.verify(senha, _dummy_target()[1])
+
+def warm_password_context() -> None:
+    """
+    Tira do primeiro login o custo de inicialização do contexto de senha:
+    carrega os backends (o bcrypt faz autoteste no primeiro uso) e escolhe o
+    hash usado por dummy_verify_password.
+    """
+    for scheme in bcrypt_context.schemes():
+        handler = bcrypt_context.handler(scheme)
+        if hasattr(handler, "get_backend"):
+            handler.get_backend()
+    _dummy_target()
+
+def _encode(claims: dict) -> str:
+    kid, key = keyset.signing_key()
+    headers = {"kid": kid} if kid else None
+    return jwt.encode(claims, key, algorithm=ALGORITHM, headers=headers)
+
+def decode_token(token: str) -> dict:
+    """Valida assinatura/expiração com a chave do `kid` do header. Levanta JWTError."""
+    kid = jwt.get_unverified_header(token).get("kid")
+    return jwt.decode(token, keyset.verification_key(kid), algorithms=[ALGORITHM])
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -20,19 +106,14 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
         expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    return _encode(to_encode)
 
 def create_refresh_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (
         expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     )
+    # jti identifica o refresh token no store de rotação/revogação
+    to_encode.setdefault("jti", uuid4().hex)
     to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
-
-
-
-
+    return _encode(to_encode)
@@ -0,0 +1,50 @@
+import asyncio
+from collections import defaultdict
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes idênticas: enquanto a busca de uma chave está em
+    andamento, novas chamadas com a mesma chave aguardam o mesmo resultado
+    (ou a mesma exceção) em vez de repetir a busca.
+
+    - Nada é cacheado: terminada a busca, a próxima chamada executa de novo
+    - A busca roda em uma task própria: se o primeiro cliente desconectar,
+      quem está aguardando continua recebendo o resultado
+    - Vale por processo/event loop; métricas por nome em `stats()`
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._executados: defaultdict[str, int] = defaultdict(int)
+        self._agrupados: defaultdict[str, int] = defaultdict(int)
+
+    async def do(self, name: str, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight_key = (name, key)
+        task = self._inflight.get(flight_key)
+        if task is None:
+            self._executados[name] += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[flight_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(flight_key, None))
+        else:
+            self._agrupados[name] += 1
+        # shield: cancelar um cliente não cancela a busca compartilhada
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            name: {
+                "executados": self._executados[name],
+                "agrupados": self._agrupados[name],
+                "em_andamento": sum(1 for n, _ in self._inflight if n == name),
+            }
+            for name in sorted(set(self._executados) | set(self._agrupados))
+        }
+
+    def clear(self) -> None:
+        self._executados.clear()
+        self._agrupados.clear()